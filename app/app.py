@@ -623,18 +623,10 @@ def main() -> int:
         from core.operations import process_drive_data
         added_rows = process_drive_data(config, container)
 
-        # Fase 3: Scraping de estados
-        from core.operations import execute_status_scraping
-        execute_status_scraping(config, container)
-
-        # Fase 4: Análisis post-comparación (opcional)
-        from core.operations import execute_post_compare_analysis
-        execute_post_compare_analysis(config, container)
-
-        # Fase 5: Generación de reporte diario
-        if not config.dry_run:
-            from core.operations import generate_daily_report
-            generate_daily_report(container)
+        # Fases 3-5: Scraping, análisis post-comparación (opcional) y
+        # reporte diario (en paralelo al scraping con --parallel-sheets)
+        from core.operations import run_pipeline
+        run_pipeline(config, container)
 
         logging.info("=== APLICACIÓN COMPLETADA EXITOSAMENTE ===")
         return 0
@@ -24,7 +24,8 @@ from .operations import (
     process_drive_data,
     execute_status_scraping,
     execute_post_compare_analysis,
-    generate_daily_report
+    generate_daily_report,
+    run_pipeline
 )
 
 __all__ = [
@@ -40,4 +41,5 @@ __all__ = [
     "execute_status_scraping",
     "execute_post_compare_analysis",
     "generate_daily_report",
+    "run_pipeline",
 ]
@@ -38,6 +38,8 @@ class AppConfig(NamedTuple):
         batch_size (int): Tamaño de batch para scraping asíncrono
         post_compare (bool): Ejecutar comparación después del scraping
         compare_batch_size (int): Tamaño de batch para comparación
+        parallel_sheets (bool): Generar el reporte diario en paralelo
+            con el scraping
     """
     start_row: int
     end_row: int | None
@@ -49,6 +51,7 @@ class AppConfig(NamedTuple):
     batch_size: int
     post_compare: bool
     compare_batch_size: int
+    parallel_sheets: bool = False
 
 
 class ServiceContainer(NamedTuple):
@@ -163,6 +166,13 @@ Ejemplos:
         f"(default: {BatchConfig.COMPARE_BATCH_SIZE})"
     )
 
+    parser.add_argument(
+        "--parallel-sheets",
+        action="store_true",
+        help="Generar el reporte diario en un hilo mientras continúa el "
+        "scraping (el reporte refleja la hoja al momento de leerla)"
+    )
+
     args = parser.parse_args()
 
     # Validaciones básicas
@@ -197,7 +207,8 @@ Ejemplos:
         max_concurrency=args.max_concurrency,
         batch_size=args.batch_size,
         post_compare=args.post_compare,
-        compare_batch_size=args.compare_batch_size
+        compare_batch_size=args.compare_batch_size,
+        parallel_sheets=args.parallel_sheets
     )
 
 
@@ -13,9 +13,13 @@ from __future__ import annotations
 import logging
 import asyncio
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 
 from .app_setup import AppConfig, ServiceContainer
+from ..config import settings
+from ..services.sheets_client import SheetsClient
+from ..utils.credentials_manager import CredentialsManager
 from ..services.tracker_service import TrackerService
 from ..utils.constants import ColumnHeaders, LogConfig, BatchConfig
 from ..utils.batch_operations import BatchOperations
@@ -151,7 +155,7 @@ def execute_post_compare_analysis(
         raise
 
 
-def generate_daily_report(container: ServiceContainer) -> None:
+def generate_daily_report(container: ServiceContainer, worksheet=None) -> None:
     """
     Genera el reporte diario basado en el estado actual de la hoja.
 
@@ -160,13 +164,16 @@ def generate_daily_report(container: ServiceContainer) -> None:
 
     Args:
         container (ServiceContainer): Contenedor de servicios
+        worksheet: Hoja de reporte ya preparada (ver
+            _prepare_daily_report_sheet); None la crea/limpia aquí
     """
     try:
         logging.info("Generando reporte diario...")
 
         report_name = container.sheets.create_or_append_daily_report(
             [],
-            prefix=settings.daily_report_prefix
+            prefix=settings.daily_report_prefix,
+            worksheet=worksheet
         )
 
         logging.info(f"Reporte diario generado exitosamente: {report_name}")
@@ -176,6 +183,65 @@ def generate_daily_report(container: ServiceContainer) -> None:
         raise
 
 
+def run_pipeline(
+    config: AppConfig,
+    container: ServiceContainer
+) -> None:
+    """
+    Ejecuta scraping, análisis post-comparación y reporte diario.
+
+    Con --parallel-sheets, la parte del reporte que no depende de los datos
+    (abrir/crear la hoja del día, limpiarla y escribir headers) corre en un
+    hilo aparte, con su propio cliente de Sheets, mientras el scraping sigue
+    en el hilo principal (el scraper síncrono de Playwright debe usarse desde
+    el hilo que lo creó). La lectura de la hoja principal y el llenado del
+    reporte ocurren recién después del post-compare, así el reporte refleja
+    los estados y COINCIDEN de esta corrida.
+
+    Args:
+        config (AppConfig): Configuración de la aplicación
+        container (ServiceContainer): Contenedor de servicios
+    """
+    make_report = not config.dry_run
+
+    if not (config.parallel_sheets and make_report):
+        execute_status_scraping(config, container)
+        execute_post_compare_analysis(config, container)
+        if make_report:
+            generate_daily_report(container)
+        return
+
+    logging.info("Modo --parallel-sheets: hoja de reporte preparada en paralelo al scraping")
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="report") as executor:
+        sheet_future = executor.submit(_prepare_daily_report_sheet)
+
+        execute_status_scraping(config, container)
+        execute_post_compare_analysis(config, container)
+
+        # Punto de sincronización: propaga errores de la preparación
+        report_sheet = sheet_future.result()
+
+    # Los datos se leen después de las escrituras finales de esta corrida
+    generate_daily_report(container, worksheet=report_sheet)
+
+
+def _prepare_daily_report_sheet():
+    """Prepara la hoja del reporte diario con un cliente de Sheets propio.
+
+    Corre en el hilo del reporte: no comparte los clientes gspread del
+    contenedor con el hilo principal.
+    """
+    sheets = _new_sheets_client()
+    return sheets.prepare_daily_report_sheet(prefix=settings.daily_report_prefix)
+
+
+def _new_sheets_client() -> SheetsClient:
+    """Crea un SheetsClient independiente (para uso desde otro hilo)."""
+    return SheetsClient(
+        CredentialsManager.get_credentials(), settings.spreadsheet_name
+    )
+
+
 # ==================== FUNCIONES AUXILIARES PRIVADAS ====================
 
 def _read_source_data(
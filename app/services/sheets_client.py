@@ -114,14 +114,33 @@ class SheetsClient:
                 raise
 
     # --- Daily report helpers ---
-    def create_or_append_daily_report(self, _rows: List[List[Any]], prefix: str = "Informe_") -> str:
+    DAILY_REPORT_HEADERS = ["ID TRACKING", "STATUS DROPI", "STATUS TRACKING", "FECHA VERIFICACIÓN"]
+
+    def prepare_daily_report_sheet(self, prefix: str = "Informe_"):
+        """Open or create today's report sheet and reset it to headers only.
+
+        Does not read the main sheet, so it can run before the statuses of
+        the current run are written.
+        """
+        sheet_name = f"{prefix}{datetime.now().strftime('%Y-%m-%d')}"
+        try:
+            ws = self.spreadsheet.worksheet(sheet_name)
+        except gspread.WorksheetNotFound:
+            ws = self.spreadsheet.add_worksheet(title=sheet_name, rows=1000, cols=10)
+        ws.clear()
+        ws.update("A1:D1", [self.DAILY_REPORT_HEADERS])
+        return ws
+
+    def create_or_append_daily_report(self, _rows: List[List[Any]], prefix: str = "Informe_", worksheet=None) -> str:
         """Create or REPLACE the daily report with rows where ALERTA == TRUE.
 
         Ignores the passed-in rows and instead reads the main sheet to ensure
-        the report reflects the current state after post-compare.
+        the report reflects the current state after post-compare. If
+        `worksheet` comes from prepare_daily_report_sheet, it is filled as is
+        (already cleared, with headers).
         """
         date_name = datetime.now().strftime("%Y-%m-%d")
-        sheet_name = f"{prefix}{date_name}"
+        sheet_name = worksheet.title if worksheet is not None else f"{prefix}{date_name}"
         try:
             # Read all records from main sheet
             records = self.read_main_records_resilient()
@@ -178,16 +197,8 @@ class SheetsClient:
                     len(records), coinc_false_count, alerta_truthy_count, len(filtered_rows)
                 )
 
-            # Create or open the report sheet
-            try:
-                ws = self.spreadsheet.worksheet(sheet_name)
-            except gspread.WorksheetNotFound:
-                ws = self.spreadsheet.add_worksheet(title=sheet_name, rows=1000, cols=10)
-
             # REPLACE: clear previous content and write fresh headers + rows
-            headers = ["ID TRACKING", "STATUS DROPI", "STATUS TRACKING", "FECHA VERIFICACIÓN"]
-            ws.clear()
-            ws.update("A1:D1", [headers])
+            ws = worksheet if worksheet is not None else self.prepare_daily_report_sheet(prefix)
             if filtered_rows:
                 end_row = 1 + len(filtered_rows)
                 if end_row > ws.row_count:
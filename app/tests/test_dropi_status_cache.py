@@ -0,0 +1,67 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+from cachetools import TTLCache
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web.dropi_scraper_async import AsyncDropiScraper  # noqa: E402
+
+URL = "https://portal.example/rastreo"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDropiStatusCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.scraper = AsyncDropiScraper(cache_ttl=60)
+        self.clock = FakeClock()
+        self.scraper._status_cache = TTLCache(maxsize=100, ttl=60, timer=self.clock)
+        self.fetch = mock.AsyncMock(return_value="ENTREGADO")
+        self.scraper._fetch_status = self.fetch
+
+    async def _get(self, tn="TN1", url=URL, status_selector="#estado"):
+        return await self.scraper.get_status(
+            tn, url=url, search_selector="#guia", status_selector=status_selector
+        )
+
+    async def test_hit_skips_fetch(self):
+        self.assertEqual(await self._get(), "ENTREGADO")
+        self.assertEqual(await self._get(), "ENTREGADO")
+        self.assertEqual(self.fetch.await_count, 1)
+
+    async def test_expired_entry_is_refetched(self):
+        await self._get()
+        self.clock.now += 61
+        await self._get()
+        self.assertEqual(self.fetch.await_count, 2)
+
+    async def test_empty_status_not_cached(self):
+        self.fetch.return_value = ""
+        self.assertEqual(await self._get(), "")
+        self.assertEqual(await self._get(), "")
+        self.assertEqual(self.fetch.await_count, 2)
+
+    async def test_key_includes_target(self):
+        await self._get()
+        await self._get(url="https://otro.example/rastreo")
+        await self._get(status_selector="#otro-estado")
+        self.assertEqual(self.fetch.await_count, 3)
+
+    async def test_clear_status_cache(self):
+        await self._get()
+        self.scraper.clear_status_cache()
+        await self._get()
+        self.assertEqual(self.fetch.await_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
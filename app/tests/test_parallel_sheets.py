@@ -0,0 +1,66 @@
+import os
+import sys
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.core import operations  # noqa: E402
+
+
+class TestRunPipelineParallelSheets(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+        self.threads = {}
+        self._lock = threading.Lock()
+
+    def _record(self, name, result=None):
+        def _step(*args, **kwargs):
+            with self._lock:
+                self.events.append(name)
+                self.threads[name] = threading.get_ident()
+            return result
+        return _step
+
+    def _run(self, parallel_sheets):
+        report_client = mock.Mock()
+        report_client.prepare_daily_report_sheet.side_effect = self._record("prepare", "report-ws")
+        container = mock.Mock()
+        container.sheets.create_or_append_daily_report.side_effect = self._record("report", "Informe_x")
+        config = mock.Mock(parallel_sheets=parallel_sheets, dry_run=False)
+
+        with mock.patch.object(operations, "execute_status_scraping", side_effect=self._record("scrape")), \
+                mock.patch.object(operations, "execute_post_compare_analysis", side_effect=self._record("compare")), \
+                mock.patch.object(operations, "_new_sheets_client", return_value=report_client):
+            operations.run_pipeline(config, container)
+        return container, report_client
+
+    def test_report_reads_after_compare(self):
+        container, _ = self._run(parallel_sheets=True)
+
+        self.assertEqual(self.events[-1], "report")
+        self.assertLess(self.events.index("scrape"), self.events.index("compare"))
+        self.assertLess(self.events.index("compare"), self.events.index("report"))
+        _, kwargs = container.sheets.create_or_append_daily_report.call_args
+        self.assertEqual(kwargs["worksheet"], "report-ws")
+
+    def test_report_thread_uses_own_client(self):
+        container, report_client = self._run(parallel_sheets=True)
+
+        report_client.prepare_daily_report_sheet.assert_called_once()
+        container.sheets.prepare_daily_report_sheet.assert_not_called()
+        self.assertNotEqual(self.threads["prepare"], self.threads["report"])
+        self.assertEqual(self.threads["scrape"], self.threads["report"])
+
+    def test_sequential_mode(self):
+        container, report_client = self._run(parallel_sheets=False)
+
+        self.assertEqual(self.events, ["scrape", "compare", "report"])
+        report_client.prepare_daily_report_sheet.assert_not_called()
+        _, kwargs = container.sheets.create_or_append_daily_report.call_args
+        self.assertIsNone(kwargs["worksheet"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,32 @@
 from __future__ import annotations
 import asyncio
 import logging
+import random
+from collections import Counter
 from contextlib import suppress
 from typing import Iterable, List, Tuple, Optional
 
+from cachetools import TTLCache
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 
 
+# Playwright + Chromium compartidos por todas las instancias del proceso.
+# Hay un navegador por combinación de opciones de lanzamiento (headless,
+# slow_mo), cada uno con su contador: start() lo incrementa y close() solo
+# apaga el navegador cuando la última instancia lo libera, así el arranque
+# (~1s) se paga una vez. Los objetos quedan atados al event loop que los
+# creó: un loop nuevo (otro asyncio.run) arranca su propio Playwright.
+_pw_ref = {"pw": None, "browsers": {}, "lock": None, "loop": None}
+
+
+def _shared_lock() -> asyncio.Lock:
+    """Lock de los navegadores compartidos para el event loop actual."""
+    loop = asyncio.get_running_loop()
+    if _pw_ref["loop"] is not loop:
+        _pw_ref.update(pw=None, browsers={}, lock=asyncio.Lock(), loop=loop)
+    return _pw_ref["lock"]
+
+
 class AsyncDropiScraper:
     """Scraper genérico para el portal (tercero) usado por Dropi.
 
@@ -18,6 +38,10 @@ class AsyncDropiScraper:
     Una vez confirmemos los selectores definitivos, los dejaremos fijos aquí.
     """
 
+    # Métricas de reintentos compartidas por todas las instancias
+    # ("retries": reintentos hechos, "exhausted": guías que agotaron intentos)
+    retry_stats: Counter = Counter()
+
     def __init__(
         self,
         headless: bool = False,
@@ -25,29 +49,81 @@ class AsyncDropiScraper:
         slow_mo: int = 200,
         timeout_ms: int = 30000,
         block_resources: bool = False,
+        retries: int = 2,
+        cache_ttl: float = 300,
+        cache_maxsize: int = 10000,
     ):
         self._headless = headless
         self._max_concurrency = max(1, int(max_concurrency))
         self._slow_mo = slow_mo if headless else max(slow_mo, 100)
+        self._retries = max(0, int(retries))
         self._timeout = int(timeout_ms)
         self._block_resources = block_resources
         self._pw = None
         self.browser = None
+        self._browser_key: Optional[Tuple[bool, int]] = None
+        self._started = False
         self._sem = asyncio.Semaphore(self._max_concurrency)
+        # Estados recientes: evita re-scrapear la misma guía dentro de la
+        # ventana TTL (comparer + reporter + reintentos del pipeline). La
+        # clave incluye URL y selectores, ya que el resultado depende de ellos
+        self._status_cache: TTLCache = TTLCache(maxsize=cache_maxsize, ttl=cache_ttl)
+
+    def clear_status_cache(self) -> None:
+        """Vacía la caché de estados (útil en pruebas)."""
+        self._status_cache.clear()
 
     async def start(self):
-        self._pw = await async_playwright().start()
-        logging.info("Launching Playwright Chromium (dropi). headless=%s", self._headless)
-        args = ["--no-sandbox", "--disable-dev-shm-usage", "--start-maximized"]
-        self.browser = await self._pw.chromium.launch(headless=self._headless, slow_mo=self._slow_mo, args=args)
+        if self._started:
+            return
+        key = (self._headless, self._slow_mo)
+        async with _shared_lock():
+            if _pw_ref["pw"] is None:
+                _pw_ref["pw"] = await async_playwright().start()
+            entry = _pw_ref["browsers"].get(key)
+            if entry is None:
+                logging.info(
+                    "Launching Playwright Chromium (dropi). headless=%s slow_mo=%s",
+                    self._headless, self._slow_mo,
+                )
+                args = ["--no-sandbox", "--disable-dev-shm-usage", "--start-maximized"]
+                browser = await _pw_ref["pw"].chromium.launch(
+                    headless=self._headless, slow_mo=self._slow_mo, args=args
+                )
+                entry = _pw_ref["browsers"][key] = {"browser": browser, "count": 0}
+            else:
+                logging.debug("Reusing shared Playwright Chromium (dropi)")
+            entry["count"] += 1
+            self._pw = _pw_ref["pw"]
+            self.browser = entry["browser"]
+            self._browser_key = key
+            self._started = True
 
     async def close(self):
+        if not self._started:
+            return
+        browser = pw = None
+        async with _shared_lock():
+            self._started = False
+            self._pw = None
+            self.browser = None
+            browsers = _pw_ref["browsers"]
+            # Sin entrada: el estado compartido ya se reinició (otro loop)
+            entry = browsers.get(self._browser_key)
+            if entry is None:
+                return
+            entry["count"] -= 1
+            if entry["count"] > 0:
+                return
+            browser = browsers.pop(self._browser_key)["browser"]
+            if not browsers:
+                pw, _pw_ref["pw"] = _pw_ref["pw"], None
         with suppress(Exception):
-            if self.browser:
-                await self.browser.close()
+            if browser:
+                await browser.close()
         with suppress(Exception):
-            if self._pw:
-                await self._pw.stop()
+            if pw:
+                await pw.stop()
 
     async def _new_context(self):
         if self._headless:
@@ -67,6 +143,21 @@ class AsyncDropiScraper:
             await ctx.route("**/*", _route_handler)
         return ctx
 
+    @staticmethod
+    def _resolve_selector(sel: str) -> str:
+        """Convierte un selector (XPath, CSS o id simple) al formato de Playwright.
+
+        - "//..."          -> "xpath=//..."
+        - "#id" / ".clase" -> sin cambios
+        - "id"             -> "#id"
+        """
+        sel = sel.strip()
+        if sel.startswith("//"):
+            return f"xpath={sel}"
+        if sel.startswith("#") or sel.startswith("."):
+            return sel
+        return f"#{sel}"
+
     async def get_status(
         self,
         tracking_number: str,
@@ -82,57 +173,106 @@ class AsyncDropiScraper:
         - status_selector: selector del elemento que contiene el estado (cuando esté claro).
         - expect_new_page: True si al buscar se abre una nueva pestaña.
         """
+        return await self._get_status_resolved(
+            tracking_number,
+            url,
+            self._resolve_selector(search_selector),
+            self._resolve_selector(status_selector) if status_selector else None,
+            expect_new_page,
+        )
+
+    async def _get_status_resolved(
+        self,
+        tracking_number: str,
+        url: str,
+        search_loc: str,
+        status_loc_sel: Optional[str],
+        expect_new_page: bool,
+    ) -> str:
+        """Igual que get_status, pero con selectores ya resueltos por _resolve_selector."""
+        key = (url, search_loc, status_loc_sel, expect_new_page, tracking_number)
+        cached = self._status_cache.get(key)
+        if cached is not None:
+            logging.debug("Dropi status cache hit for %s", tracking_number)
+            return cached
+        text = await self._fetch_status(
+            tracking_number, url, search_loc, status_loc_sel, expect_new_page
+        )
+        # Los vacíos no se cachean para permitir reintentar en la siguiente llamada
+        if text:
+            self._status_cache[key] = text
+        return text
+
+    async def _fetch_status(
+        self,
+        tracking_number: str,
+        url: str,
+        search_loc: str,
+        status_loc_sel: Optional[str],
+        expect_new_page: bool,
+    ) -> str:
+        """Ejecuta el scraping real de una guía (sin caché)."""
         context = None
         page = None
         popup = None
         try:
             context = await self._new_context()
             page = await context.new_page()
-            await page.goto(url, wait_until="domcontentloaded", timeout=self._timeout)
-
-            # Resolver el locator del input
-            sel = search_selector.strip()
-            if sel.startswith("//"):
-                input_loc = page.locator(f"xpath={sel}")
-            elif sel.startswith("#") or sel.startswith("."):
-                input_loc = page.locator(sel)
-            else:
-                input_loc = page.locator(f"#{sel}")
 
-            await input_loc.wait_for(timeout=self._timeout)
-            await input_loc.fill("")
-            await input_loc.type(tracking_number, delay=20)
+            # Búsqueda + lectura del estado con reintentos (backoff exponencial
+            # con jitter). Se ejecuta dentro del semáforo del worker, así que
+            # los reintentos cuentan contra la concurrencia máxima.
+            for attempt in range(self._retries + 1):
+                await page.goto(url, wait_until="domcontentloaded", timeout=self._timeout)
+
+                input_loc = page.locator(search_loc)
 
-            try:
-                if expect_new_page:
-                    async with context.expect_page(timeout=self._timeout) as new_page_info:
+                await input_loc.wait_for(timeout=self._timeout)
+                await input_loc.fill("")
+                await input_loc.type(tracking_number, delay=20)
+
+                try:
+                    if expect_new_page:
+                        async with context.expect_page(timeout=self._timeout) as new_page_info:
+                            await input_loc.press("Enter")
+                        popup = await new_page_info.value
+                        await popup.wait_for_load_state("domcontentloaded", timeout=self._timeout)
+                    else:
                         await input_loc.press("Enter")
-                    popup = await new_page_info.value
-                    await popup.wait_for_load_state("domcontentloaded", timeout=self._timeout)
-                else:
-                    await input_loc.press("Enter")
-                    await page.wait_for_load_state("domcontentloaded", timeout=self._timeout)
-            except PlaywrightTimeoutError:
-                pass
-
-            target = popup if popup is not None else page
-
-            if status_selector:
-                # Resolver el locator del estado
-                ssel = status_selector.strip()
-                if ssel.startswith("//"):
-                    status_loc = target.locator(f"xpath={ssel}")
-                elif ssel.startswith("#") or ssel.startswith("."):
-                    status_loc = target.locator(ssel)
-                else:
-                    status_loc = target.locator(f"#{ssel}")
+                        await page.wait_for_load_state("domcontentloaded", timeout=self._timeout)
+                except PlaywrightTimeoutError:
+                    pass
+
+                target = popup if popup is not None else page
+
+                # Si aún no tenemos selector, devolvemos vacío y dejamos observar manualmente
+                if not status_loc_sel:
+                    return ""
+
+                status_loc = target.locator(status_loc_sel)
                 try:
                     await status_loc.wait_for(timeout=self._timeout)
                     text = (await status_loc.first.inner_text()).strip()
                     return text
                 except PlaywrightTimeoutError:
-                    return ""
-            # Si aún no tenemos selector, devolvemos vacío y dejamos observar manualmente
+                    if attempt == self._retries:
+                        self.retry_stats["exhausted"] += 1
+                        logging.warning(
+                            "Dropi status timeout for %s after %d attempts",
+                            tracking_number, attempt + 1,
+                        )
+                        return ""
+                    self.retry_stats["retries"] += 1
+                    delay = (2 ** attempt) * 0.5 + random.random() * 0.3
+                    logging.debug(
+                        "Dropi status timeout for %s, retrying in %.2fs",
+                        tracking_number, delay,
+                    )
+                    if popup is not None:
+                        with suppress(Exception):
+                            await popup.close()
+                        popup = None
+                    await asyncio.sleep(delay)
             return ""
         except Exception as e:
             logging.error("Dropi scraper error for %s: %s", tracking_number, e)
@@ -157,27 +297,39 @@ class AsyncDropiScraper:
         expect_new_page: bool = False,
         rps: float | None = None,
     ) -> List[Tuple[str, str]]:
-        results: List[Tuple[str, str]] = []
+        """Consulta varias guías concurrentemente.
+
+        Returns:
+            Lista de (tracking, estado) en el mismo orden de entrada.
+        """
+        tns = list(tracking_numbers)
+        # Cada worker escribe en la posición de su guía: el resultado queda
+        # en el orden de entrada sin ordenar después.
+        results: List[Tuple[str, str]] = [None] * len(tns)  # type: ignore[list-item]
+
+        # Los selectores son constantes para todo el lote: resolver una sola vez
+        search_loc = self._resolve_selector(search_selector)
+        status_loc_sel = self._resolve_selector(status_selector) if status_selector else None
 
-        async def worker(tn: str):
+        async def worker(i: int, tn: str):
             async with self._sem:
-                text = await self.get_status(tn, url, search_selector, status_selector, expect_new_page)
-                results.append((tn, text))
+                text = await self._get_status_resolved(tn, url, search_loc, status_loc_sel, expect_new_page)
+                results[i] = (tn, text)
 
         tasks = []
         if rps and rps > 0:
+            loop = asyncio.get_running_loop()
             interval = 1.0 / float(rps)
-            start = asyncio.get_event_loop().time()
-            for i, tn in enumerate(tracking_numbers):
-                async def delayed_launch(tn=tn, i=i):
-                    target_time = start + i * interval
-                    now = asyncio.get_event_loop().time()
-                    if target_time > now:
-                        await asyncio.sleep(target_time - now)
-                    await worker(tn)
-                tasks.append(asyncio.create_task(delayed_launch()))
+            start = loop.time()
+            # Un solo despachador lanza cada tarea cuando le toca, en vez de
+            # crear N tareas por adelantado que solo duermen hasta su turno.
+            for i, tn in enumerate(tns):
+                delay = start + i * interval - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(worker(i, tn)))
         else:
-            tasks = [asyncio.create_task(worker(tn)) for tn in tracking_numbers]
+            tasks = [asyncio.create_task(worker(i, tn)) for i, tn in enumerate(tns)]
 
         await asyncio.gather(*tasks)
         return results
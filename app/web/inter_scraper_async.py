@@ -184,9 +184,10 @@ class AsyncInterScraper:
                     await context.close()
 
     async def get_status_many(self, tracking_numbers: Iterable[str], rps: float | None = None) -> List[Tuple[str, str]]:
-        results: List[Tuple[str, str]] = []
+        # Snapshot único: tracking_numbers puede ser un generador
+        tn_list = list(tracking_numbers)
 
-        async def worker(tn: str):
+        async def worker(tn: str) -> Tuple[str, str]:
             async with self._sem:
                 # Retries with backoff
                 delay = 0.75
@@ -194,37 +195,32 @@ class AsyncInterScraper:
                     logging.info("[PW] [%-14s] Attempt %d", tn, attempt + 1)
                     status = await self.get_status(tn)
                     if status:
-                        results.append((tn, status))
                         logging.info("[PW] [%-14s] Done in %d attempts", tn, attempt + 1)
-                        break
+                        return tn, status
                     if attempt < self._retries:
                         logging.debug("[PW] [%-14s] Empty, retrying after %.2fs", tn, delay)
                         await asyncio.sleep(delay)
                         delay *= 2
-                else:
-                    # After retries, record empty string to keep row mapping intact
-                    results.append((tn, ""))
-                    logging.info("[PW] [%-14s] Empty after retries", tn)
+                # After retries, record empty string to keep row mapping intact
+                logging.info("[PW] [%-14s] Empty after retries", tn)
+                return tn, ""
         tasks = []
         if rps and rps > 0:
             interval = 1.0 / float(rps)
             start = asyncio.get_event_loop().time()
-            logging.info("[PW] Scheduling %d tasks with RPS=%.2f (interval=%.3fs)", len(list(tracking_numbers)), rps, interval)
-            # Need a snapshot since tracking_numbers may be a generator
-            tn_list = list(tracking_numbers)
-            for i, tn in enumerate(tracking_numbers):
+            logging.info("[PW] Scheduling %d tasks with RPS=%.2f (interval=%.3fs)", len(tn_list), rps, interval)
+            for i, tn in enumerate(tn_list):
                 # Stagger task starts to respect RPS
                 async def delayed_launch(tn=tn, i=i):
                     target_time = start + i * interval
                     now = asyncio.get_event_loop().time()
                     if target_time > now:
                         await asyncio.sleep(target_time - now)
-                    await worker(tn)
+                    return await worker(tn)
                 tasks.append(asyncio.create_task(delayed_launch()))
         else:
-            tn_list = list(tracking_numbers)
             logging.info("[PW] Launching %d tasks immediately (no RPS throttling)", len(tn_list))
             tasks = [asyncio.create_task(worker(tn)) for tn in tn_list]
 
-        await asyncio.gather(*tasks)
-        return results
+        # gather conserva el orden de entrada (no el de finalización)
+        return list(await asyncio.gather(*tasks))
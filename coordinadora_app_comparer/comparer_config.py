@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from functools import lru_cache
 import os
 from dotenv import load_dotenv
 
@@ -9,12 +10,14 @@ env_path = os.path.join(app_dir, '.env')
 load_dotenv(env_path)
 
 
-@dataclass
+@dataclass(frozen=True)
 class ComparerSettings:
     spreadsheet_name: str
     credentials_path: str
 
 
+# Una sola instancia por proceso: .env ya se cargó al importar el módulo
+@lru_cache(maxsize=1)
 def load_settings() -> ComparerSettings:
     spreadsheet_name = os.getenv("SPREADSHEET_NAME", "seguimiento")
     credentials_path = os.path.join(app_dir, "credentials.json")
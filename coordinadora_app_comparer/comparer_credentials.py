@@ -5,17 +5,17 @@ Carga credentials.json desde el directorio local de la app.
 import os
 import logging
 from typing import Optional
-from oauth2client.service_account import ServiceAccountCredentials
+from google.oauth2.service_account import Credentials
 
 
-def load_service_account_credentials(path: str) -> Optional[ServiceAccountCredentials]:
+def load_service_account_credentials(path: str) -> Optional[Credentials]:
     """Carga credenciales de servicio desde un archivo JSON.
 
     Args:
         path: Ruta al credentials.json
 
     Returns:
-        ServiceAccountCredentials o None si no existe/ocurre error
+        Credentials (google-auth) o None si no existe/ocurre error
     """
     if not os.path.exists(path):
         logging.error(f"Credentials not found at: {path}")
@@ -26,7 +26,7 @@ def load_service_account_credentials(path: str) -> Optional[ServiceAccountCreden
             'https://www.googleapis.com/auth/spreadsheets',
             'https://www.googleapis.com/auth/drive'
         ]
-        creds = ServiceAccountCredentials.from_json_keyfile_name(path, scopes)
+        creds = Credentials.from_service_account_file(path, scopes=scopes)
         logging.info("Service account credentials loaded")
         return creds
     except Exception as e:
@@ -7,6 +7,11 @@ import json
 import logging
 from typing import Dict, List
 
+try:
+    import ahocorasick  # opcional: pyahocorasick (búsqueda multi-patrón en C)
+except ImportError:
+    ahocorasick = None
+
 
 class StatusNormalizer:
     """Normaliza estados de Coordinadora y Dropi para comparar.
@@ -24,6 +29,18 @@ class StatusNormalizer:
         self.coordinadora_map = self._load_map(coord_path)
         self.dropi_map = self._load_map(dropi_path)
 
+        # Variantes ya normalizadas (strip + lower) una sola vez, en dos
+        # tuplas paralelas que conservan el orden del mapa
+        pairs = [
+            (variant.strip().lower(), key)
+            for key, variants in self.coordinadora_map.items()
+            for variant in variants
+            if isinstance(variant, str)
+        ]
+        self._coord_variants_lc = tuple(v for v, _ in pairs)
+        self._coord_keys = tuple(k for _, k in pairs)
+        self._coord_ac = self._build_automaton(self._coord_variants_lc)
+
         logging.info(f"Coordinadora map: {len(self.coordinadora_map)} keys")
         logging.info(f"Dropi map: {len(self.dropi_map)} entries")
 
@@ -41,6 +58,49 @@ class StatusNormalizer:
             logging.exception(f"Error loading map {path}: {e}")
             return {}
 
+    @staticmethod
+    def _build_automaton(variants):
+        """Automata Aho-Corasick variante -> índice (None sin pyahocorasick).
+
+        Con variantes repetidas se conserva el primer índice, así la
+        prioridad sigue siendo el orden del mapa.
+        """
+        if ahocorasick is None:
+            return None
+        automaton = ahocorasick.Automaton()
+        for i, v in enumerate(variants):
+            if v and not automaton.exists(v):
+                automaton.add_word(v, i)
+        if len(automaton) == 0:
+            return None
+        automaton.make_automaton()
+        return automaton
+
+    def _match_coordinadora(self, clean: str) -> int:
+        """Índice de la primera variante (en orden del mapa) que coincide.
+
+        Coincide si la variante está contenida en el texto o el texto en la
+        variante. Retorna -1 si ninguna coincide.
+        """
+        variants = self._coord_variants_lc
+        # Sin automata: recorrido lineal
+        if self._coord_ac is None:
+            for i, v in enumerate(variants):
+                if v in clean or clean in v:
+                    return i
+            return -1
+
+        # "variante en texto": un solo recorrido del texto con el automata
+        # da la variante de menor índice; "texto en variante" solo puede
+        # ganar con un índice anterior, así que basta revisar hasta ahí
+        best = min((i for _, i in self._coord_ac.iter(clean)),
+                   default=len(variants))
+        for i in range(best):
+            v = variants[i]
+            if clean in v or not v:
+                return i
+        return best if best < len(variants) else -1
+
     def normalize_coordinadora(self, raw_text: str) -> str:
         """Normaliza texto crudo de Coordinadora a palabra clave.
 
@@ -53,16 +113,15 @@ class StatusNormalizer:
 
         clean = raw_text.strip().lower()
 
-        for key, variants in self.coordinadora_map.items():
-            for variant in variants:
-                if not isinstance(variant, str):
-                    continue
-                v = variant.strip().lower()
-                if v in clean or clean in v:
-                    logging.debug(
-                        f"Coordinadora: '{raw_text}' -> '{key}' via '{variant}'"
-                    )
-                    return key
+        i = self._match_coordinadora(clean)
+        if i >= 0:
+            key = self._coord_keys[i]
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug(
+                    f"Coordinadora: '{raw_text}' -> '{key}' "
+                    f"via '{self._coord_variants_lc[i]}'"
+                )
+            return key
 
         logging.warning(f"Coordinadora: sin mapping para: '{raw_text}'")
         return "DESCONOCIDO"
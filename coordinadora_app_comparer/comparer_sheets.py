@@ -4,10 +4,10 @@ Google Sheets Client para APP COMPARER (Coordinadora).
 Cliente simplificado para operaciones de lectura/escritura en Google Sheets.
 """
 import logging
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Optional
 
 import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+from google.oauth2.service_account import Credentials
 
 
 class SheetsClient:
@@ -15,7 +15,7 @@ class SheetsClient:
 
     def __init__(
         self,
-        credentials: ServiceAccountCredentials,
+        credentials: Credentials,
         spreadsheet_name: str
     ):
         self.credentials = credentials
@@ -24,6 +24,8 @@ class SheetsClient:
         gc = gspread.authorize(credentials)
         self.spreadsheet = gc.open(spreadsheet_name)
         self.worksheet = self.spreadsheet.sheet1
+        # Fila 1 cacheada tras la primera lectura (None = sin leer)
+        self._headers: Optional[List[str]] = None
 
         logging.info(f"Conectado a spreadsheet: {spreadsheet_name}")
 
@@ -32,8 +34,17 @@ class SheetsClient:
         logging.info(f"Leídos {len(records)} registros")
         return records
 
+    def _get_headers(self) -> List[str]:
+        if self._headers is None:
+            self._headers = self.worksheet.row_values(1)
+        return self._headers
+
+    def invalidate_headers(self) -> None:
+        """Descarta los headers cacheados (usar si la fila 1 cambia fuera)."""
+        self._headers = None
+
     def ensure_columns(self, column_names: List[str]) -> None:
-        headers = self.worksheet.row_values(1)
+        headers = self._get_headers()
 
         for col_name in column_names:
             if col_name not in headers:
@@ -49,7 +60,7 @@ class SheetsClient:
         if not updates:
             return
 
-        headers = self.worksheet.row_values(1)
+        headers = self._get_headers()
 
         try:
             coinciden_col = headers.index("COINCIDEN") + 1
@@ -4,6 +4,9 @@ Script de prueba para el normalizador de estados.
 Prueba la normalización de estados de Interrapidísimo usando el mapa.
 """
 
+import pytest
+
+import comparer_normalizer
 from comparer_normalizer import StatusNormalizer
 
 def test_normalizer():
@@ -53,5 +56,86 @@ def test_normalizer():
     print("\n" + "=" * 70)
 
 
+# Variantes en orden de prioridad, con solapamientos a propósito: una
+# variante contenida en otra, una repetida con otra clave y una vacía
+OVERLAPPING_VARIANTS = [
+    ("entregado parcial", "PARCIAL"),
+    ("entregado", "ENTREGADO"),
+    ("entrega", "EN_ENTREGA"),
+    ("devuelto al remitente", "DEVUELTO"),
+    ("devuelto", "REENVIO"),
+    ("entregado", "DUPLICADO"),
+    ("en", "CORTO"),
+]
+
+OVERLAPPING_TEXTS = [
+    "entregado parcial al cliente",
+    "entregado",
+    "entrega",
+    "entreg",
+    "paquete entregado hoy",
+    "devuelto al remitente por dirección errada",
+    "devuelto",
+    "en",
+    "xyz",
+]
+
+
+def _reference_match(variants, clean):
+    """Semántica esperada: primera variante (orden del mapa) que coincide."""
+    for i, v in enumerate(variants):
+        if v in clean or clean in v:
+            return i
+    return -1
+
+
+def _normalizer(pairs=None, use_automaton=False):
+    """StatusNormalizer con variantes propias y con/sin automata."""
+    normalizer = StatusNormalizer()
+    if pairs is not None:
+        normalizer._coord_variants_lc = tuple(v for v, _ in pairs)
+        normalizer._coord_keys = tuple(k for _, k in pairs)
+    normalizer._coord_ac = (
+        normalizer._build_automaton(normalizer._coord_variants_lc)
+        if use_automaton else None
+    )
+    return normalizer
+
+
+requires_automaton = pytest.mark.skipif(
+    comparer_normalizer.ahocorasick is None,
+    reason="pyahocorasick no instalado"
+)
+
+
+@pytest.mark.parametrize("use_automaton", [
+    False, pytest.param(True, marks=requires_automaton)
+])
+@pytest.mark.parametrize("pairs", [
+    OVERLAPPING_VARIANTS,
+    OVERLAPPING_VARIANTS + [("", "VACIO")],
+    [("", "VACIO")] + OVERLAPPING_VARIANTS,
+], ids=["solapadas", "vacia_al_final", "vacia_primero"])
+@pytest.mark.parametrize("text", OVERLAPPING_TEXTS)
+def test_match_priority_with_overlaps(pairs, text, use_automaton):
+    """Con o sin automata gana la primera variante en orden del mapa."""
+    normalizer = _normalizer(pairs, use_automaton)
+    variants = tuple(v for v, _ in pairs)
+    assert normalizer._match_coordinadora(text) == _reference_match(variants, text)
+
+
+@requires_automaton
+@pytest.mark.parametrize("text", [
+    "Entregado", "En tránsito", "En reparto", "Devuelto al remitente",
+    "Novedad en la entrega", "Guía generada", "Estado sin mapping",
+])
+def test_automaton_matches_linear_on_real_map(text):
+    """El mapa real da la misma clave con y sin automata."""
+    linear = _normalizer(use_automaton=False)
+    automaton = _normalizer(use_automaton=True)
+    assert (automaton.normalize_coordinadora(text)
+            == linear.normalize_coordinadora(text))
+
+
 if __name__ == "__main__":
     test_normalizer()
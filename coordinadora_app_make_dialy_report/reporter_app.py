@@ -31,6 +31,22 @@ from reporter_logging import setup_logging
 from reporter_credentials import load_credentials
 from reporter_sheets import SheetsManager
 
+# Valores de COINCIDEN que marcan discrepancia, en cualquier casing. Un
+# lookup en el set evita .upper() por fila (y no falla con celdas no str)
+_DISCREPANCY_VALUES = frozenset({"NO", "No", "nO", "no"})
+
+
+def _is_discrepancy(value: object) -> bool:
+    """True si COINCIDEN vale NO (sin importar casing ni espacios)."""
+    if value in _DISCREPANCY_VALUES:
+        return True
+    # strip() solo para celdas con relleno (" no "): las filas SI y NO
+    # sin espacios se resuelven con el lookup de arriba
+    return (
+        isinstance(value, str) and len(value) > 2
+        and value.strip() in _DISCREPANCY_VALUES
+    )
+
 
 def parse_arguments() -> argparse.Namespace:
     """
@@ -80,10 +96,10 @@ def generate_report(
     # Leer todos los registros
     all_records = sheets_manager.read_all_records()
 
-    # Filtrar solo discrepancias (COINCIDEN=NO)
+    # Filtrar solo discrepancias (COINCIDEN=NO), sin modificar los registros
     discrepancias = [
         r for r in all_records
-        if r.get("COINCIDEN", "").upper() == "NO"
+        if _is_discrepancy(r.get("COINCIDEN"))
     ]
 
     logging.info(f"Total registros: {len(all_records)}")
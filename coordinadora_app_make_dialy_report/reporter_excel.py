@@ -18,8 +18,8 @@ import logging
 from typing import List, Dict, Any
 
 import pandas as pd
-from openpyxl import load_workbook
 from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.utils import get_column_letter
 
 
 class ExcelGenerator:
@@ -54,27 +54,25 @@ class ExcelGenerator:
         # Ruta de salida
         output_path = os.path.join(output_dir, filename)
         
-        # Guardar Excel
+        # Guardar Excel y aplicar formato en una sola escritura
+        # (sin reabrir el archivo con load_workbook)
         logging.info(f"Generando Excel: {output_path}")
-        df.to_excel(output_path, index=False, engine='openpyxl')
-        
-        # Aplicar formato
-        self._apply_formatting(output_path)
+        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+            df.to_excel(writer, index=False, sheet_name='Sheet1')
+            self._apply_formatting(writer.sheets['Sheet1'], df)
         
         logging.info(f"Excel generado exitosamente: {len(data)} registros")
         return output_path
     
     @staticmethod
-    def _apply_formatting(file_path: str) -> None:
+    def _apply_formatting(ws, df: pd.DataFrame) -> None:
         """
-        Aplica formato profesional al archivo Excel.
+        Aplica formato profesional a la hoja antes de guardarla.
         
         Args:
-            file_path: Ruta del archivo Excel
+            ws: Worksheet de openpyxl abierta por el ExcelWriter
+            df: Datos escritos en la hoja
         """
-        wb = load_workbook(file_path)
-        ws = wb.active
-        
         # Formato de headers
         header_fill = PatternFill(
             start_color="4472C4",
@@ -88,21 +86,14 @@ class ExcelGenerator:
             cell.font = header_font
             cell.alignment = Alignment(horizontal='center')
         
-        # Autoajustar columnas
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except (TypeError, AttributeError):
-                    pass
-            
+        # Autoajustar columnas a partir del DataFrame (sin recorrer celdas)
+        for i, col in enumerate(df.columns, start=1):
+            values = df[col].dropna().astype(str)
+            max_length = max(
+                int(values.str.len().max()) if len(values) else 0,
+                len(str(col))
+            )
             adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
+            ws.column_dimensions[get_column_letter(i)].width = adjusted_width
         
-        # Guardar cambios
-        wb.save(file_path)
         logging.info("Formato aplicado al Excel")
@@ -15,6 +15,7 @@ Versión: 2.0.0
 
 from __future__ import annotations
 import logging
+from operator import itemgetter
 from typing import List, Dict, Any
 from datetime import datetime
 
@@ -113,9 +114,13 @@ class SheetsManager:
         headers = list(data[0].keys())
         rows = [headers]
 
-        for record in data:
-            row = [record.get(col, "") for col in headers]
-            rows.append(row)
+        # get_all_records() devuelve todas las claves en cada registro, así
+        # que un itemgetter precompilado extrae la fila completa de una vez
+        get_row = itemgetter(*headers)
+        if len(headers) == 1:
+            rows.extend([get_row(record)] for record in data)
+        else:
+            rows.extend(list(get_row(record)) for record in data)
 
         # Escribir datos en batch
         new_sheet.update(f"A1:Z{len(rows)}", rows)
@@ -8,6 +8,22 @@ from playwright.sync_api import (
 )
 from typing import List, Tuple
 
+# Indicador de tiempo tipo '(2 Días)', compilado una sola vez
+_CLEAN_STATUS_RE = re.compile(r'\s*\(\d+\s+[Dd]ías?\)')
+
+# Lee guía y estado de todas las filas en una sola llamada (evaluate_all)
+# en vez de varios round trips por fila; filas sin guía o estado dan ''
+_ROWS_JS = """divs => divs.map(d => {
+    const id = d.querySelector('span.text-sm.font-medium.truncate');
+    const st = d.querySelector(
+        'div.text-sm.text-text-primary.flex.items-center.gap-1'
+    );
+    return [
+        id ? (id.getAttribute('title') || id.innerText || '') : '',
+        st ? (st.innerText || '') : '',
+    ];
+})"""
+
 
 class EnviaScraper:
     """Playwright-based scraper to fetch tracking status from Envía via 17track.
@@ -62,8 +78,7 @@ class EnviaScraper:
     def _clean_status(self, status_text: str) -> str:
         """Remove time indicators like '(2 Días)' from status."""
         # Remove patterns like (X Días), (X días), etc.
-        cleaned = re.sub(r'\s*\(\d+\s+[Dd]ías?\)', '', status_text)
-        return cleaned.strip()
+        return _CLEAN_STATUS_RE.sub('', status_text).strip()
 
     def get_status(self, tracking_number: str) -> str:
         """
@@ -396,40 +411,19 @@ class EnviaScraper:
                 count = result_divs.count()
                 logging.info("Fallback found %d result divs", count)
 
-            for i in range(count):
-                try:
-                    div = result_divs.nth(i)
-
-                    # Extract tracking ID from title attribute or text
-                    id_locator = div.locator(
-                        'span.text-sm.font-medium.truncate'
-                    )
-                    tracking_id = id_locator.get_attribute('title')
-
-                    if not tracking_id:
-                        tracking_id = id_locator.inner_text()
+            rows = result_divs.evaluate_all(_ROWS_JS)
 
-                    tracking_id = tracking_id.strip()
+            for tracking_id, status_text in rows:
+                tracking_id = tracking_id.strip()
+                status_text = self._clean_status(status_text)
 
-                    # Extract status (without time)
-                    status_locator = div.locator(
-                        'div.text-sm.text-text-primary.'
-                        'flex.items-center.gap-1'
+                if tracking_id and status_text:
+                    results.append((tracking_id, status_text))
+                    logging.debug(
+                        "Extracted: %s -> %s",
+                        tracking_id,
+                        status_text
                     )
-                    status_text = status_locator.inner_text()
-                    status_text = self._clean_status(status_text)
-
-                    if tracking_id and status_text:
-                        results.append((tracking_id, status_text))
-                        logging.debug(
-                            "Extracted: %s -> %s",
-                            tracking_id,
-                            status_text
-                        )
-
-                except Exception as e:
-                    logging.warning("Error extracting result %d: %s", i, e)
-                    continue
 
         except Exception as e:
             logging.error("Error extracting results: %s", e)
@@ -3,6 +3,7 @@ import asyncio
 import logging
 import re
 from contextlib import suppress
+from itertools import chain, islice
 from typing import Iterable, List, Tuple
 
 from playwright.async_api import (
@@ -10,6 +11,22 @@ from playwright.async_api import (
     TimeoutError as PlaywrightTimeoutError
 )
 
+# Indicador de tiempo tipo '(2 Días)', compilado una sola vez
+_CLEAN_STATUS_RE = re.compile(r'\s*\(\d+\s+[Dd]ías?\)')
+
+# Lee guía y estado de todas las filas en una sola llamada (evaluate_all)
+# en vez de varios round trips por fila; filas sin guía o estado dan ''
+_ROWS_JS = """divs => divs.map(d => {
+    const id = d.querySelector('span.text-sm.font-medium.truncate');
+    const st = d.querySelector(
+        'div.text-sm.text-text-primary.flex.items-center.gap-1'
+    );
+    return [
+        id ? (id.getAttribute('title') || id.innerText || '') : '',
+        st ? (st.innerText || '') : '',
+    ];
+})"""
+
 
 class AsyncEnviaScraper:
     """Async Playwright scraper for Envía via 17track.net with batch processing.
@@ -39,7 +56,6 @@ class AsyncEnviaScraper:
         self._batch_size = min(batch_size, 40)  # Max 40 per batch
         self._pw = None
         self.browser = None
-        self._sem = asyncio.Semaphore(self._max_concurrency)
 
     async def start(self):
         logging.info("[PW] Starting async_playwright...")
@@ -95,8 +111,7 @@ class AsyncEnviaScraper:
     def _clean_status(self, status_text: str) -> str:
         """Remove time indicators like '(2 Días)' from status."""
         # Remove patterns like (X Días), (X días), etc.
-        cleaned = re.sub(r'\s*\(\d+\s+[Dd]ías?\)', '', status_text)
-        return cleaned.strip()
+        return _CLEAN_STATUS_RE.sub('', status_text).strip()
 
     async def _extract_results_from_page(
         self,
@@ -131,43 +146,19 @@ class AsyncEnviaScraper:
                 count = await result_divs.count()
                 logging.info("[PW] Fallback found %d result divs", count)
 
-            for i in range(count):
-                try:
-                    div = result_divs.nth(i)
-
-                    # Extract tracking ID from title attribute or text
-                    id_locator = div.locator(
-                        'span.text-sm.font-medium.truncate'
-                    )
-                    tracking_id = await id_locator.get_attribute('title')
-
-                    if not tracking_id:
-                        tracking_id = await id_locator.inner_text()
+            rows = await result_divs.evaluate_all(_ROWS_JS)
 
-                    tracking_id = tracking_id.strip()
-
-                    # Extract status (without time)
-                    status_locator = div.locator(
-                        'div.text-sm.text-text-primary.flex.items-center.gap-1'
-                    )
-                    status_text = await status_locator.inner_text()
-                    status_text = self._clean_status(status_text)
-
-                    if tracking_id and status_text:
-                        results.append((tracking_id, status_text))
-                        logging.debug(
-                            "[PW] Extracted: %s -> %s",
-                            tracking_id,
-                            status_text
-                        )
+            for tracking_id, status_text in rows:
+                tracking_id = tracking_id.strip()
+                status_text = self._clean_status(status_text)
 
-                except Exception as e:
-                    logging.warning(
-                        "[PW] Error extracting result %d: %s",
-                        i,
-                        e
+                if tracking_id and status_text:
+                    results.append((tracking_id, status_text))
+                    logging.debug(
+                        "[PW] Extracted: %s -> %s",
+                        tracking_id,
+                        status_text
                     )
-                    continue
 
         except Exception as e:
             logging.error("[PW] Error extracting results: %s", e)
@@ -558,66 +549,83 @@ class AsyncEnviaScraper:
         Returns:
             List of (tracking_number, status) tuples
         """
-        results: List[Tuple[str, str]] = []
-        tn_list = list(tracking_numbers)
-
-        # Split into batches of 40
-        batches = []
-        for i in range(0, len(tn_list), self._batch_size):
-            batch = tn_list[i:i + self._batch_size]
+        # Split into batches of 40 en una sola pasada sobre el iterable
+        # (sin copiar antes la lista completa)
+        it = iter(tracking_numbers)
+        batches: List[List[str]] = []
+        total = 0
+        while True:
+            batch = list(islice(it, self._batch_size))
+            if not batch:
+                break
             batches.append(batch)
+            total += len(batch)
 
         logging.info(
             "[PW] Processing %d tracking numbers in %d batches",
-            len(tn_list),
+            total,
             len(batches)
         )
 
-        # Process batches with concurrency control
-        async def process_batch(batch: List[str], batch_num: int):
-            async with self._sem:
-                logging.info(
-                    "[PW] Starting batch %d/%d (%d items)",
-                    batch_num + 1,
-                    len(batches),
-                    len(batch)
-                )
+        # Cada batch devuelve su lista y el worker la deja en su índice; se
+        # aplanan al final en el orden de entrada
+        batch_results_by_index: List[List[Tuple[str, str]]] = [
+            [] for _ in batches
+        ]
+        pending: asyncio.Queue = asyncio.Queue()
+        for i, batch in enumerate(batches):
+            pending.put_nowait((i, batch))
 
-                # Retry logic for batch
-                for attempt in range(self._retries + 1):
-                    batch_results = await self.get_status_batch(batch)
+        async def process_batch(
+            batch: List[str], batch_num: int
+        ) -> List[Tuple[str, str]]:
+            logging.info(
+                "[PW] Starting batch %d/%d (%d items)",
+                batch_num + 1,
+                len(batches),
+                len(batch)
+            )
+
+            # Retry logic for batch
+            for attempt in range(self._retries + 1):
+                batch_results = await self.get_status_batch(batch)
+
+                # Check if we got meaningful results
+                success_count = sum(
+                    1 for _, status in batch_results if status
+                )
 
-                    # Check if we got meaningful results
-                    success_count = sum(
-                        1 for _, status in batch_results if status
+                if success_count > 0 or attempt == self._retries:
+                    logging.info(
+                        "[PW] Batch %d complete: "
+                        "%d/%d successful",
+                        batch_num + 1,
+                        success_count,
+                        len(batch)
                     )
+                    return batch_results
 
-                    if success_count > 0 or attempt == self._retries:
-                        results.extend(batch_results)
-                        logging.info(
-                            "[PW] Batch %d complete: "
-                            "%d/%d successful",
-                            batch_num + 1,
-                            success_count,
-                            len(batch)
-                        )
-                        break
+                if attempt < self._retries:
+                    delay = 2 * (attempt + 1)
+                    logging.warning(
+                        "[PW] Batch %d failed, "
+                        "retrying after %ds",
+                        batch_num + 1,
+                        delay
+                    )
+                    await asyncio.sleep(delay)
 
-                    if attempt < self._retries:
-                        delay = 2 * (attempt + 1)
-                        logging.warning(
-                            "[PW] Batch %d failed, "
-                            "retrying after %ds",
-                            batch_num + 1,
-                            delay
-                        )
-                        await asyncio.sleep(delay)
+        # Pool fijo de max_concurrency workers que toman batches de la
+        # cola: hay tantas corrutinas vivas como slots, no una por batch
+        async def worker():
+            while True:
+                try:
+                    i, batch = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                batch_results_by_index[i] = await process_batch(batch, i)
 
-        # Process all batches
-        tasks = [
-            process_batch(batch, i)
-            for i, batch in enumerate(batches)
-        ]
-        await asyncio.gather(*tasks)
+        workers = min(self._max_concurrency, len(batches))
+        await asyncio.gather(*(worker() for _ in range(workers)))
 
-        return results
+        return list(chain.from_iterable(batch_results_by_index))
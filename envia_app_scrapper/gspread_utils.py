@@ -0,0 +1,92 @@
+"""
+Utilidades de gspread compartidas por los clientes de Sheets de la app.
+
+Responsabilidades:
+- Reintentar llamadas a la API ante errores transitorios (gspread_retry)
+- Decodificar respuestas con orjson si está instalado (HTTP_CLIENT)
+
+Mismo archivo en cada app que habla con Sheets (las apps se despliegan por
+separado y no comparten código): se copia tal cual, no se edita por app.
+
+Autor: Sistema de Tracking Dropi-Inter
+Fecha: Octubre 2025
+"""
+
+from __future__ import annotations
+import functools
+import logging
+import random
+import time
+
+import gspread
+from gspread.http_client import HTTPClient
+from requests import Response
+
+try:
+    import orjson
+except ImportError:  # opcional: sin orjson se usa el json estándar
+    orjson = None
+
+
+class OrjsonHTTPClient(HTTPClient):
+    """HTTPClient de gspread que decodifica las respuestas con orjson."""
+
+    def request(self, *args, **kwargs) -> Response:
+        response = super().request(*args, **kwargs)
+        content = response.content
+        response.json = lambda **_: orjson.loads(content)
+        return response
+
+
+# Respuestas grandes (get_values/get_all_records) se parsean ~2-3x más rápido
+HTTP_CLIENT = OrjsonHTTPClient if orjson is not None else HTTPClient
+
+
+# Errores transitorios de la API (cuota 429 y fallas del servidor/gateway)
+RETRY_STATUS = frozenset({429, 500, 502, 503})
+
+
+def gspread_retry(func=None, *, max_attempts: int = 6, base: float = 1.5):
+    """
+    Reintenta llamadas a la API de Sheets ante errores transitorios.
+
+    Backoff exponencial min(base**intento, 60) con ±20% de jitter; si la
+    respuesta trae Retry-After se respeta ese valor. Envuelve llamadas
+    individuales a la API, no métodos con lógica local (caché, escrituras
+    a disco): gspread_retry(ws.update)(...).
+
+    Args:
+        func: Función a envolver
+        max_attempts: Intentos totales antes de re-lanzar el error
+        base: Base del backoff exponencial (segundos)
+
+    Returns:
+        Función envuelta con reintentos
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            for attempt in range(1, max_attempts + 1):
+                try:
+                    return fn(*args, **kwargs)
+                except gspread.exceptions.APIError as e:
+                    response = getattr(e, "response", None)
+                    status = getattr(response, "status_code", None)
+                    if status not in RETRY_STATUS or attempt == max_attempts:
+                        raise
+
+                    retry_after = response.headers.get("Retry-After")
+                    if retry_after and retry_after.isdigit():
+                        delay = float(retry_after)
+                    else:
+                        delay = min(base ** attempt, 60)
+                        delay *= random.uniform(0.8, 1.2)
+
+                    logging.warning(
+                        f"API de Sheets respondió {status}; reintento "
+                        f"{attempt}/{max_attempts - 1} en {delay:.1f}s"
+                    )
+                    time.sleep(delay)
+        return wrapper
+
+    return decorator(func) if func is not None else decorator
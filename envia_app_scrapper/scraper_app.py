@@ -30,17 +30,24 @@ import argparse
 import logging
 import asyncio
 import sys
+from collections import defaultdict
 from datetime import datetime
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 from scraper_config import settings
 from scraper_logging import setup_logging
 from scraper_sheets import SheetsClient
 from scraper_web import EnviaScraper
+from scraper_cache import StatusCache
 from scraper_web_async import AsyncEnviaScraper
 from scraper_credentials import load_credentials
 import time
 
+# Sobre este número de items, el modo síncrono delega en el scraper
+# asíncrono con concurrencia baja (mismo resultado, varias páginas a la vez)
+SYNC_ASYNC_THRESHOLD = 20
+SYNC_ASYNC_CONCURRENCY = 3
+
 # Tiempo por defecto entre batches/items cuando --time-test está activo (segundos)
 TIMEOUT_TEST = int(
     getattr(__import__('os'), 'environ', {}).get('TIMEOUT_TEST', 5)
@@ -146,7 +153,8 @@ def parse_arguments() -> argparse.Namespace:
 
 
 def filter_records(
-    records: List[dict],
+    headers: List[str],
+    rows: List[List[str]],
     start_row: int,
     end_row: int | None,
     limit: int | None,
@@ -156,7 +164,8 @@ def filter_records(
     Filtra y prepara registros para procesamiento.
 
     Args:
-        records: Lista de registros del spreadsheet
+        headers: Headers de la hoja (fila 1)
+        rows: Filas de datos del spreadsheet (desde la fila 2)
         start_row: Fila inicial (1-based)
         end_row: Fila final (inclusiva)
         limit: Límite de registros a procesar
@@ -167,7 +176,18 @@ def filter_records(
     """
     items: List[Tuple[int, str]] = []
 
-    for idx, record in enumerate(records, start=2):
+    if "ID TRACKING" not in headers:
+        logging.error("Columna 'ID TRACKING' no encontrada")
+        return items
+
+    # Índices resueltos una sola vez para todo el recorrido
+    tracking_idx = headers.index("ID TRACKING")
+    status_idx = (
+        headers.index("STATUS TRANSPORTADORA")
+        if "STATUS TRANSPORTADORA" in headers else None
+    )
+
+    for idx, row in enumerate(rows, start=2):
         if idx < start_row:
             continue
         if end_row and idx > end_row:
@@ -175,7 +195,10 @@ def filter_records(
         if limit and len(items) >= limit:
             break
 
-        tracking = str(record.get("ID TRACKING", "")).strip()
+        tracking = (
+            str(row[tracking_idx]).strip()
+            if tracking_idx < len(row) else ""
+        )
         if not tracking:
             continue
 
@@ -188,11 +211,9 @@ def filter_records(
             )
 
         # Verificar si solo procesar filas vacías
-        current_status = str(
-            record.get("STATUS TRANSPORTADORA", "")
-        ).strip()
-        if only_empty and current_status:
-            continue
+        if only_empty and status_idx is not None and status_idx < len(row):
+            if str(row[status_idx]).strip():
+                continue
 
         items.append((idx, tracking))
 
@@ -201,53 +222,171 @@ def filter_records(
 
 def scrape_sync(
     sheets: SheetsClient,
-    scraper: EnviaScraper,
+    scraper: EnviaScraper | None,
     start_row: int,
     end_row: int | None,
     limit: int | None,
     only_empty: bool,
     dry_run: bool, time_test_enabled: bool = False,
     time_test_seconds: int | None = None,
+    flush_every: int = 200,
 ) -> int:
     """
     Ejecuta scraping síncrono de estados.
 
+    Si no se recibe scraper y hay más de SYNC_ASYNC_THRESHOLD items (sin
+    --time-test), delega en scrape_async con SYNC_ASYNC_CONCURRENCY páginas.
+    En otro caso crea (y cierra) su propio EnviaScraper.
+
     Args:
         sheets: Cliente de Google Sheets
-        scraper: Scraper síncrono
+        scraper: Scraper síncrono (None = crearlo solo si hace falta)
         start_row: Fila inicial
         end_row: Fila final
         limit: Límite de filas
         only_empty: Solo procesar vacíos
         dry_run: Modo simulación
+        flush_every: Estados acumulados antes de guardar en batch
 
     Returns:
         int: Número de filas procesadas
     """
     logging.info("Iniciando scraping síncrono...")
 
-    records = sheets.read_all_records()
-    items = filter_records(records, start_row, end_row, limit, only_empty)
+    headers, rows = sheets.read_values()
+    items = filter_records(
+        headers, rows, start_row, end_row, limit, only_empty
+    )
 
     if not items:
         logging.warning("No hay items para procesar")
         return 0
 
+    # asyncio.run no puede convivir con un Playwright síncrono ya iniciado,
+    # por eso solo se delega cuando el scraper aún no existe
+    if (
+        scraper is None
+        and len(items) > SYNC_ASYNC_THRESHOLD
+        and not time_test_enabled
+    ):
+        logging.info(
+            f"{len(items)} items: usando scraper asíncrono "
+            f"(concurrencia {SYNC_ASYNC_CONCURRENCY})"
+        )
+        return asyncio.run(
+            scrape_async(
+                sheets,
+                start_row,
+                end_row,
+                limit,
+                SYNC_ASYNC_CONCURRENCY,
+                flush_every,
+                only_empty,
+                dry_run,
+                items=items,
+            )
+        )
+
+    if scraper is None:
+        scraper = EnviaScraper(
+            headless=settings.headless,
+            status_cache=(
+                StatusCache(settings.status_cache_path)
+                if settings.status_cache else None
+            ),
+        )
+        owns_scraper = True
+    else:
+        owns_scraper = False
+
+    try:
+        return _scrape_items_sync(
+            sheets, scraper, items, dry_run,
+            time_test_enabled, time_test_seconds, flush_every
+        )
+    finally:
+        if owns_scraper:
+            scraper.close()
+
+
+def _scrape_items_sync(
+    sheets: SheetsClient,
+    scraper: EnviaScraper,
+    items: List[Tuple[int, str]],
+    dry_run: bool,
+    time_test_enabled: bool,
+    time_test_seconds: int | None,
+    flush_every: int,
+) -> int:
+    """
+    Recorre los items uno a uno con el scraper síncrono.
+
+    Args:
+        sheets: Cliente de Google Sheets
+        scraper: Scraper síncrono ya iniciado
+        items: Lista de (row_num, tracking_id)
+        dry_run: Modo simulación
+        time_test_enabled: Esperar entre items (--time-test)
+        time_test_seconds: Segundos de espera (override de TIMEOUT_TEST)
+        flush_every: Estados acumulados antes de guardar en batch
+
+    Returns:
+        int: Número de filas procesadas
+    """
     processed = 0
     saved_count = 0
+    # Estados pendientes de guardar: se escriben en un solo batch cada
+    # flush_every resultados en vez de una llamada a la API por celda
+    pending: List[Tuple[int, str]] = []
+    # Tamaño de pending que dispara el próximo flush: si un batch falla
+    # sus filas siguen pendientes y se reintentan con el siguiente
+    flush_at = flush_every
+
+    def flush() -> bool:
+        nonlocal saved_count, flush_at
+        if not pending:
+            return True
+        if sheets.batch_update_status(pending, column="STATUS TRANSPORTADORA"):
+            saved_count += len(pending)
+            logging.info(f"✓ Guardados {len(pending)} estados")
+            pending.clear()
+            flush_at = flush_every
+            return True
+        flush_at = len(pending) + flush_every
+        logging.warning(
+            f"⚠️  No se pudieron guardar {len(pending)} estados; "
+            f"se reintentarán en el próximo guardado"
+        )
+        return False
+
+    def final_flush() -> None:
+        # Último intento: lo que no se pueda guardar se reporta por fila
+        if flush():
+            return
+        rows = ", ".join(str(row) for row, _ in pending)
+        logging.error(
+            f"✗ {len(pending)} estados sin guardar (filas: {rows})"
+        )
+        pending.clear()
+
+    # Estados ya consultados en esta corrida: las guías repetidas en
+    # varias filas se scrapean una sola vez
+    seen: Dict[str, str] = {}
 
     try:
         for idx, tracking in items:
             try:
-                status = scraper.get_status(tracking)
+                if tracking in seen:
+                    status = seen[tracking]
+                else:
+                    status = scraper.get_status(tracking)
+                    seen[tracking] = status
 
                 if status and not dry_run:
-                    # Guardar inmediatamente el estado
-                    sheets.update_cell(idx, "STATUS TRANSPORTADORA", status)
-                    saved_count += 1
-                    logging.info(
-                        f"[{idx}] {tracking}: {status} - ✓ Guardado"
-                    )
+                    pending.append((idx, status))
+                    logging.info(f"[{idx}] {tracking}: {status}")
+                    if len(pending) >= flush_at:
+                        flush()
                 else:
                     logging.info(f"[{idx}] {tracking}: {status or 'VACIO'}")
 
@@ -267,12 +406,16 @@ def scrape_sync(
 
     except KeyboardInterrupt:
         logging.warning("\n⚠️  Interrupción detectada por el usuario")
+        final_flush()
         logging.info(
             f"✓ Progreso guardado: {saved_count} de {processed} "
             f"filas procesadas"
         )
         raise
 
+    finally:
+        final_flush()
+
     logging.info(
         f"Scraping completado: {processed} filas procesadas, "
         f"{saved_count} guardadas"
@@ -290,6 +433,7 @@ async def scrape_async(
     only_empty: bool,
     dry_run: bool, time_test_enabled: bool = False,
     time_test_seconds: int | None = None,
+    items: List[Tuple[int, str]] | None = None,
 ) -> int:
     """
     Ejecuta scraping asíncrono de estados.
@@ -303,14 +447,18 @@ async def scrape_async(
         batch_size: Tamaño de batch
         only_empty: Solo procesar vacíos
         dry_run: Modo simulación
+        items: Items ya filtrados (None = leer y filtrar la hoja)
 
     Returns:
         int: Número de filas procesadas
     """
     logging.info("Iniciando scraping asíncrono...")
 
-    records = sheets.read_all_records()
-    items = filter_records(records, start_row, end_row, limit, only_empty)
+    if items is None:
+        headers, rows = sheets.read_values()
+        items = filter_records(
+            headers, rows, start_row, end_row, limit, only_empty
+        )
 
     if not items:
         logging.warning("No hay items para procesar")
@@ -318,7 +466,12 @@ async def scrape_async(
 
     scraper = AsyncEnviaScraper(
         headless=settings.headless,
-        max_concurrency=concurrency
+        max_concurrency=concurrency,
+        storage_state_path=settings.browser_state_path,
+        status_cache=(
+            StatusCache(settings.status_cache_path)
+            if settings.status_cache else None
+        ),
     )
 
     try:
@@ -326,41 +479,108 @@ async def scrape_async(
 
         # Procesar en batches con guardado incremental
         total_processed = 0
+        pending_write: asyncio.Task | None = None
+        # Filas de la escritura en curso y las de escrituras fallidas, que
+        # se reintentan sumadas a la siguiente
+        pending_updates: List[Tuple[int, str]] = []
+        unsaved: List[Tuple[int, str]] = []
+
+        async def wait_pending_write() -> None:
+            nonlocal pending_write, pending_updates
+            if pending_write is None:
+                return
+            try:
+                saved = await pending_write
+            except Exception as e:
+                logging.error(f"Error guardando resultados: {e}")
+                saved = False
+            finally:
+                pending_write = None
+            if saved:
+                logging.info("✓ Resultados guardados exitosamente")
+            else:
+                unsaved.extend(pending_updates)
+                logging.warning(
+                    f"⚠️  No se pudieron guardar {len(pending_updates)} "
+                    f"estados; se reintentarán en el próximo guardado"
+                )
+            pending_updates = []
+
+        async def final_write() -> None:
+            # Último intento: lo que no se pueda guardar se reporta por fila
+            nonlocal pending_write, pending_updates
+            await wait_pending_write()
+            if not unsaved:
+                return
+            pending_updates = unsaved[:]
+            unsaved.clear()
+            pending_write = asyncio.create_task(
+                asyncio.to_thread(
+                    sheets.batch_update_status,
+                    pending_updates,
+                    "STATUS TRANSPORTADORA"
+                )
+            )
+            await wait_pending_write()
+            if unsaved:
+                rows = ", ".join(str(row) for row, _ in unsaved)
+                logging.error(
+                    f"✗ {len(unsaved)} estados sin guardar (filas: {rows})"
+                )
+
+        # Agrupar filas por guía: cada guía única se scrapea una sola vez y
+        # su estado se replica a todas sus filas
+        groups: Dict[str, List[int]] = defaultdict(list)
+        for idx, tn in items:
+            groups[tn].append(idx)
+        unique_tns = list(groups)
+        if len(unique_tns) < len(items):
+            logging.info(
+                f"{len(items)} filas, {len(unique_tns)} guías únicas"
+            )
 
         try:
-            for i in range(0, len(items), batch_size):
-                batch = items[i:i + batch_size]
-                tracking_numbers = [tn for _, tn in batch]
+            for i in range(0, len(unique_tns), batch_size):
+                tracking_numbers = unique_tns[i:i + batch_size]
 
                 logging.info(
                     f"Procesando batch {i//batch_size + 1}/"
-                    f"{(len(items) + batch_size - 1)//batch_size}: "
-                    f"{len(batch)} items"
+                    f"{(len(unique_tns) + batch_size - 1)//batch_size}: "
+                    f"{len(tracking_numbers)} guías"
                 )
 
                 try:
                     results = await scraper.get_status_many(tracking_numbers)
-                    status_map = dict(results)
 
                     if not dry_run:
-                        updates = []
-                        for idx, tn in batch:
-                            status = status_map.get(tn, "")
-                            if status:
-                                updates.append((idx, status))
-
-                        # Guardar inmediatamente después de cada batch
+                        updates = [
+                            (idx, status)
+                            for tn, status in results if status
+                            for idx in groups[tn]
+                        ]
+
+                        # Guardar en segundo plano mientras se scrapea el
+                        # siguiente batch (máximo una escritura en curso)
                         if updates:
+                            await wait_pending_write()
+                            # Sumar las filas de escrituras fallidas
+                            updates = unsaved + updates
+                            unsaved.clear()
                             logging.info(
                                 f"Guardando {len(updates)} resultados..."
                             )
-                            sheets.batch_update_status(
-                                updates,
-                                column="STATUS TRANSPORTADORA"
+                            pending_updates = updates
+                            pending_write = asyncio.create_task(
+                                asyncio.to_thread(
+                                    sheets.batch_update_status,
+                                    updates,
+                                    "STATUS TRANSPORTADORA"
+                                )
                             )
-                            logging.info("✓ Resultados guardados exitosamente")
 
-                    total_processed += len(batch)
+                    total_processed += sum(
+                        len(groups[tn]) for tn in tracking_numbers
+                    )
                     logging.info(f"Progreso: {total_processed}/{len(items)}")
 
                     # Si --time-test está activo, esperar TIMEOUT_TEST segundos
@@ -384,12 +604,17 @@ async def scrape_async(
             logging.warning(
                 "\n⚠️  Interrupción detectada por el usuario"
             )
+            await final_write()
             logging.info(
                 f"✓ Progreso guardado hasta el momento: "
                 f"{total_processed}/{len(items)} filas procesadas"
             )
             raise
 
+        # Esperar la última escritura (y reintentar las fallidas) antes
+        # de cerrar
+        await final_write()
+
         logging.info(f"Scraping asíncrono completado: {total_processed} filas")
         return total_processed
 
@@ -433,21 +658,17 @@ def main() -> int:
                 )
             )
         else:
-            scraper = EnviaScraper(headless=settings.headless)
-            try:
-                processed = scrape_sync(
-                    sheets,
-                    scraper,
-                    args.start_row,
-                    args.end_row,
-                    args.limit,
-                    args.only_empty,
-                    args.dry_run,
-                    time_test_enabled=args.time_test,
-                    time_test_seconds=args.time_test_seconds,
-                )
-            finally:
-                scraper.close()
+            processed = scrape_sync(
+                sheets,
+                None,
+                args.start_row,
+                args.end_row,
+                args.limit,
+                args.only_empty,
+                args.dry_run,
+                time_test_enabled=args.time_test,
+                time_test_seconds=args.time_test_seconds,
+            )
 
         logging.info(f"=== SCRAPER COMPLETADO: {processed} filas ===")
         return 0
@@ -0,0 +1,115 @@
+"""
+Caché persistente de estados por número de guía.
+
+Guarda en SQLite el último estado obtenido de 17track para cada guía, con
+un vencimiento que depende del estado: los estados finales (entregado)
+cambian poco y se conservan más tiempo que los estados en tránsito.
+
+Responsabilidades:
+- Consultar estados vigentes para un conjunto de guías
+- Guardar estados nuevos con TTL según el estado
+
+Autor: Sistema de Tracking Dropi-Inter
+Fecha: Octubre 2025
+"""
+
+from __future__ import annotations
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+# TTL por estado (texto en minúsculas); el resto usa DEFAULT_TTL
+DEFAULT_TTL = 6 * 3600
+TTL_BY_STATUS: Dict[str, int] = {
+    "entregado": 30 * 24 * 3600,
+}
+
+
+class StatusCache:
+    """Caché SQLite tracking -> estado con vencimiento por fila."""
+
+    def __init__(self, path: str):
+        """
+        Inicializa la caché (crea el archivo y la tabla si no existen).
+
+        Args:
+            path: Ruta del archivo SQLite
+        """
+        self._path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "tn TEXT PRIMARY KEY, status TEXT, expires REAL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Una conexión por operación: la caché se puede usar desde varios
+        # hilos (get_status_many) sin compartir conexiones. El "with" de
+        # sqlite3 solo hace commit/rollback; la conexión se cierra aparte
+        conn = sqlite3.connect(self._path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def ttl_for(status: str) -> int:
+        """
+        Devuelve el TTL (segundos) que corresponde a un estado.
+
+        Args:
+            status: Estado crudo de la web
+
+        Returns:
+            int: Segundos de vigencia
+        """
+        return TTL_BY_STATUS.get(status.strip().lower(), DEFAULT_TTL)
+
+    def get_many(self, tracking_numbers: Iterable[str]) -> Dict[str, str]:
+        """
+        Obtiene los estados vigentes de varias guías.
+
+        Args:
+            tracking_numbers: Guías a consultar
+
+        Returns:
+            Dict[str, str]: Guía -> estado, solo para aciertos vigentes
+        """
+        tns = list(dict.fromkeys(tracking_numbers))
+        if not tns:
+            return {}
+        placeholders = ",".join("?" * len(tns))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT tn, status FROM cache "
+                f"WHERE expires > ? AND tn IN ({placeholders})",
+                [time.time(), *tns],
+            ).fetchall()
+        return dict(rows)
+
+    def put_many(self, results: Iterable[Tuple[str, str]]) -> None:
+        """
+        Guarda estados nuevos (los vacíos no se guardan).
+
+        Args:
+            results: Tuplas (guía, estado)
+        """
+        now = time.time()
+        rows: List[Tuple[str, str, float]] = [
+            (tn, status, now + self.ttl_for(status))
+            for tn, status in results if status
+        ]
+        if not rows:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache (tn, status, expires) "
+                "VALUES (?, ?, ?)",
+                rows,
+            )
@@ -30,6 +30,17 @@ class ScraperSettings:
     spreadsheet_name: str = os.getenv("SPREADSHEET_NAME", "seguimiento")
     headless: bool = os.getenv("HEADLESS", "true").lower() == "true"
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
+    # Caché SQLite de estados por guía (modos síncrono y async)
+    status_cache: bool = os.getenv("STATUS_CACHE", "false").lower() == "true"
+    status_cache_path: str = os.getenv(
+        "STATUS_CACHE_PATH",
+        os.path.join(app_dir, ".cache", "status_cache.sqlite3")
+    )
+    # Cookies/consentimiento de 17track entre ejecuciones (modo async)
+    browser_state_path: str = os.getenv(
+        "BROWSER_STATE_PATH",
+        os.path.join(app_dir, ".cache", "envia_state.json")
+    )
 
 
 settings = ScraperSettings()
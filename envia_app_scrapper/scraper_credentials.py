@@ -12,12 +12,18 @@ Fecha: Octubre 2025
 
 from __future__ import annotations
 import os
+from functools import lru_cache
+
 from oauth2client.service_account import ServiceAccountCredentials
 
 
+@lru_cache(maxsize=1)
 def load_credentials(credentials_path: str = None):
     """
     Carga credenciales de Google desde credentials.json LOCAL.
+
+    Memoizada: llamadas repetidas en el mismo proceso reutilizan las
+    credenciales ya cargadas.
     
     Args:
         credentials_path: Ruta al archivo de credenciales
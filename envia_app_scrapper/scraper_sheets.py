@@ -3,7 +3,7 @@ Cliente simplificado de Google Sheets para App Scraper.
 
 Responsabilidades:
 - Leer registros del spreadsheet
-- Actualizar celdas individuales
+- Actualizar celdas individuales (o acumuladas con batch())
 - Batch updates optimizados para estados
 
 Autor: Sistema de Tracking Dropi-Inter
@@ -12,8 +12,41 @@ Fecha: Octubre 2025
 
 from __future__ import annotations
 import gspread
+from gspread.utils import absolute_range_name
 import logging
-from typing import List, Dict, Any, Tuple
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple
+
+from gspread_utils import HTTP_CLIENT, gspread_retry
+
+
+def _col_to_letter(col_num: int) -> str:
+    """Convierte número de columna a letra (1 -> A, 27 -> AA)."""
+    result = ""
+    while col_num > 0:
+        col_num -= 1
+        result = chr(col_num % 26 + 65) + result
+        col_num //= 26
+    return result
+
+
+# Letras precalculadas para A..ZZ (índice = número de columna)
+_COL_LETTERS: Tuple[str, ...] = tuple(_col_to_letter(i) for i in range(703))
+
+
+# Filas máximas por values_batch_update en batch_update_status
+BATCH_CHUNK_SIZE = 5000
+
+
+# Clientes gspread autorizados por credencial (id del objeto), para no
+# re-autorizar cuando se crean varios SheetsClient en el mismo proceso
+_GC_CACHE: Dict[int, gspread.Client] = {}
+
+# (spreadsheet, sheet1) ya resueltos por (id de credencial, nombre o ID):
+# abrir por nombre y leer sheet1 son dos round-trips por cada SheetsClient
+_SS_CACHE: Dict[
+    Tuple[int, str], Tuple[gspread.Spreadsheet, gspread.Worksheet]
+] = {}
 
 
 class SheetsClient:
@@ -27,17 +60,50 @@ class SheetsClient:
             credentials: Credenciales de Google
             spreadsheet_name: Nombre o ID de la hoja de cálculo
         """
-        self.gc = gspread.authorize(credentials)
+        self.gc = _GC_CACHE.get(id(credentials))
+        if self.gc is None:
+            self.gc = gspread.authorize(
+                credentials, http_client=HTTP_CLIENT
+            )
+            _GC_CACHE[id(credentials)] = self.gc
+
+        key = (id(credentials), spreadsheet_name)
+        cached = _SS_CACHE.get(key)
+        if cached is not None:
+            self.spreadsheet, self.sheet = cached
+            logging.info(f"Spreadsheet reutilizado: {spreadsheet_name}")
+        else:
+            self.spreadsheet = self._open(spreadsheet_name)
+            self.sheet = self.spreadsheet.sheet1
+            _SS_CACHE[key] = (self.spreadsheet, self.sheet)
+
+        # Mapa header -> número de columna (1-based), cargado bajo demanda
+        self._col_index: Optional[Dict[str, int]] = None
+
+        # Escrituras acumuladas dentro de batch() (None = fuera de un batch)
+        self._pending: Optional[List[Dict[str, Any]]] = None
+
+    def _open(self, spreadsheet_name: str) -> gspread.Spreadsheet:
+        """
+        Abre el spreadsheet por nombre y, si falla, por ID.
 
+        Args:
+            spreadsheet_name: Nombre o ID de la hoja de cálculo
+
+        Returns:
+            gspread.Spreadsheet: Spreadsheet abierto
+        """
         # Intentar abrir por nombre primero
         try:
-            self.spreadsheet = self.gc.open(spreadsheet_name)
+            spreadsheet = gspread_retry(self.gc.open)(spreadsheet_name)
             logging.info(f"Spreadsheet abierto por nombre: {spreadsheet_name}")
+            return spreadsheet
         except Exception as e:
             # Si falla, intentar abrir por ID
             try:
-                self.spreadsheet = self.gc.open_by_key(spreadsheet_name)
+                spreadsheet = gspread_retry(self.gc.open_by_key)(spreadsheet_name)
                 logging.info(f"Spreadsheet abierto por ID: {spreadsheet_name}")
+                return spreadsheet
             except Exception as e2:
                 # Listar hojas disponibles para ayudar al usuario
                 try:
@@ -53,25 +119,146 @@ class SheetsClient:
                     )
                 raise e2
 
-        self.sheet = self.spreadsheet.sheet1
-
     def read_all_records(self) -> List[Dict[str, Any]]:
         """
         Lee todos los registros de la hoja.
 
+        Una sola llamada values_batch_get sobre el rango usado; los dicts
+        se arman aquí (sin el row_values(1) extra de get_all_records). Los
+        valores llegan como texto formateado.
+
         Returns:
             List[Dict]: Lista de registros
         """
         try:
-            return self.sheet.get_all_records()
+            resp = gspread_retry(self.spreadsheet.values_batch_get)(
+                ranges=[absolute_range_name(self.sheet.title)]
+            )
         except Exception as e:
             logging.error(f"Error leyendo registros: {e}")
             return []
 
+        values = resp["valueRanges"][0].get("values", [])
+        if not values:
+            return []
+        headers, *rows = values
+        self._set_headers(headers)
+        width = len(headers)
+        return [
+            dict(zip(headers, row + [""] * (width - len(row))))
+            for row in rows
+        ]
+
+    def read_values(self) -> Tuple[List[str], List[List[str]]]:
+        """
+        Lee la hoja como valores crudos (sin construir un dict por fila).
+
+        Returns:
+            Tuple[List[str], List[List[str]]]: (headers, filas de datos)
+        """
+        try:
+            values = gspread_retry(self.sheet.get_values)()
+        except Exception as e:
+            logging.error(f"Error leyendo valores: {e}")
+            return [], []
+
+        if not values:
+            return [], []
+        # Aprovechar la lectura para refrescar el mapa de columnas
+        self._set_headers(values[0])
+        return values[0], values[1:]
+
+    def _set_headers(self, headers: List[str]) -> None:
+        """Reconstruye el mapa header -> columna (1-based)."""
+        self._col_index = {}
+        for i, header in enumerate(headers, start=1):
+            self._col_index.setdefault(header, i)
+
+    def invalidate_headers(self) -> None:
+        """
+        Descarta el mapa de columnas cacheado.
+
+        Usar tras modificar la fila 1 (agregar/renombrar columnas); la
+        siguiente búsqueda relee los headers.
+        """
+        self._col_index = None
+
+    def _column_index(self, column_name: str) -> int:
+        """
+        Resuelve el número de columna (1-based) de un header.
+
+        Usa el mapa cacheado; solo relee la fila 1 la primera vez o si el
+        header no está (p. ej. la columna se agregó después).
+
+        Args:
+            column_name: Nombre de la columna
+
+        Returns:
+            int: Número de columna (1-based)
+
+        Raises:
+            ValueError: Si la columna no existe en la hoja
+        """
+        if self._col_index is None or column_name not in self._col_index:
+            self._set_headers(gspread_retry(self.sheet.row_values)(1))
+        try:
+            return self._col_index[column_name]
+        except KeyError:
+            raise ValueError(f"Columna '{column_name}' no encontrada")
+
+    @contextmanager
+    def batch(self):
+        """
+        Acumula las llamadas a update_cell y las envía juntas al salir.
+
+        Dentro del bloque update_cell no llama a la API: encola la celda y
+        al final se hace un único values_batch_update. Los batch anidados
+        se suman al exterior.
+
+        Example:
+            with sheets.batch():
+                sheets.update_cell(2, "STATUS TRANSPORTADORA", "ENTREGADO")
+                sheets.update_cell(3, "STATUS TRANSPORTADORA", "EN TRANSITO")
+        """
+        if self._pending is not None:
+            yield self
+            return
+
+        self._pending = []
+        try:
+            yield self
+        finally:
+            pending, self._pending = self._pending, None
+            if pending:
+                self._flush(pending)
+
+    def _flush(self, data: List[Dict[str, Any]]) -> bool:
+        """
+        Envía un lote de rangos con un único values_batch_update.
+
+        Args:
+            data: Lista de {"range": A1, "values": [[...]]}
+
+        Returns:
+            bool: True si exitoso
+        """
+        try:
+            gspread_retry(self.spreadsheet.values_batch_update)({
+                "valueInputOption": "RAW",
+                "data": data
+            })
+            logging.info(f"Batch de celdas enviado: {len(data)} celdas")
+            return True
+        except Exception as e:
+            logging.error(f"Error enviando batch de celdas: {e}")
+            return False
+
     def update_cell(self, row: int, column_name: str, value: str) -> bool:
         """
         Actualiza una celda específica.
 
+        Dentro de batch() la escritura se encola y se envía al salir.
+
         Args:
             row: Número de fila (1-based)
             column_name: Nombre de la columna
@@ -81,9 +268,14 @@ class SheetsClient:
             bool: True si exitoso
         """
         try:
-            headers = self.sheet.row_values(1)
-            col_idx = headers.index(column_name) + 1
-            self.sheet.update_cell(row, col_idx, value)
+            col_idx = self._column_index(column_name)
+            if self._pending is not None:
+                self._pending.append({
+                    "range": f"{self._col_letter(col_idx)}{row}",
+                    "values": [[value]]
+                })
+                return True
+            gspread_retry(self.sheet.update_cell)(row, col_idx, value)
             return True
         except Exception as e:
             logging.error(
@@ -108,22 +300,24 @@ class SheetsClient:
             bool: True si exitoso
         """
         try:
-            headers = self.sheet.row_values(1)
-            status_col = headers.index(column) + 1
-
-            # Preparar actualizaciones solo para STATUS ENVIA
-            batch_data = []
-            for row, status in updates:
-                batch_data.append({
-                    "range": f"{self._col_letter(status_col)}{row}",
-                    "values": [[status]]
-                })
+            letter = self._col_letter(self._column_index(column))
 
-            # Enviar batch
-            self.spreadsheet.values_batch_update({
-                "valueInputOption": "RAW",
-                "data": batch_data
-            })
+            # Una fila repetida queda con su último valor: dos rangos sobre
+            # la misma celda no deben viajar en el mismo request
+            ordered = sorted(dict(updates).items())
+            # Payloads muy grandes se parten en requests secuenciales de
+            # hasta BATCH_CHUNK_SIZE filas (límites por request de Sheets)
+            for start in range(0, len(ordered), BATCH_CHUNK_SIZE):
+                # Preparar actualizaciones solo para STATUS ENVIA
+                batch_data = self._coalesce_ranges(
+                    letter, ordered[start:start + BATCH_CHUNK_SIZE]
+                )
+
+                # Enviar batch
+                gspread_retry(self.spreadsheet.values_batch_update)({
+                    "valueInputOption": "RAW",
+                    "data": batch_data
+                })
 
             logging.info(f"Batch update exitoso: {len(updates)} filas")
             return True
@@ -132,20 +326,60 @@ class SheetsClient:
             logging.error(f"Error en batch update: {e}")
             return False
 
+    @staticmethod
+    def _coalesce_ranges(
+        letter: str,
+        updates: List[Tuple[int, str]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Agrupa filas consecutivas de una columna en un solo rango.
+
+        Actualizar todas las filas colapsa a un rango (F2:F1001); las
+        filas sueltas quedan como celdas individuales (F7).
+
+        Args:
+            letter: Letra de la columna
+            updates: Lista de tuplas (row, value) ordenada por fila y sin
+                filas repetidas
+
+        Returns:
+            List[Dict]: Datos para values_batch_update
+        """
+        data: List[Dict[str, Any]] = []
+        start = prev = None
+        values: List[List[str]] = []
+
+        def close_run():
+            a1 = f"{letter}{start}" if start == prev else f"{letter}{start}:{letter}{prev}"
+            data.append({"range": a1, "values": values})
+
+        for row, value in updates:
+            if prev is not None and row == prev + 1:
+                values.append([value])
+            else:
+                if prev is not None:
+                    close_run()
+                start = row
+                values = [[value]]
+            prev = row
+        if prev is not None:
+            close_run()
+        return data
+
     @staticmethod
     def _col_letter(col_num: int) -> str:
         """
         Convierte número de columna a letra (1 -> A, 27 -> AA).
 
+        Hasta ZZ (702) se busca en una tabla precalculada; más allá se
+        calcula aritméticamente.
+
         Args:
             col_num: Número de columna (1-indexed)
 
         Returns:
             str: Letra de columna
         """
-        result = ""
-        while col_num > 0:
-            col_num -= 1
-            result = chr(col_num % 26 + 65) + result
-            col_num //= 26
-        return result
+        if 1 <= col_num <= 702:
+            return _COL_LETTERS[col_num]
+        return _col_to_letter(col_num)
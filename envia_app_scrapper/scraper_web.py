@@ -1,12 +1,17 @@
 from __future__ import annotations
+import atexit
 import logging
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import suppress
 from playwright.sync_api import (
     sync_playwright,
     TimeoutError as PlaywrightTimeoutError
 )
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from scraper_cache import StatusCache
 
 
 class EnviaScraper:
@@ -17,14 +22,108 @@ class EnviaScraper:
     RAW (without time indicators like '(2 Días)').
 
     Normalization is handled elsewhere by TrackerService using JSON mappings.
+
+    Pages are kept warm between batches (same context, cookies accepted),
+    so only the first batch pays the cold-start navigation.
     """
 
-    def __init__(self, headless: bool = True, batch_size: int = 40):
-        self._pw = sync_playwright().start()
+    TRACK_URL = "https://www.17track.net/es/carriers/env%C3%ADa-envia"
+    # Consulta directa de una sola guía (sin formulario de batch)
+    SINGLE_TRACK_URL = "https://www.17track.net/es/track#nums={tn}"
+    STATUS_SELECTOR = "div.text-sm.text-text-primary.flex.items-center.gap-1"
+    # Estado de la fila cuya guía coincide con la buscada (null mientras no
+    # aparezca): una fila de otra guía nunca se toma como resultado
+    _ROW_STATUS_JS = """([tn, statusSel]) => {
+        const want = tn.trim().toUpperCase();
+        const rows = document.querySelectorAll(
+            'div.flex.items-center.gap-2:has(span.text-sm.font-medium.truncate)'
+        );
+        for (const row of rows) {
+            const s = row.querySelector('span.text-sm.font-medium.truncate');
+            const id = ((s.getAttribute('title') || s.innerText) || '').trim();
+            if (id.toUpperCase() !== want) continue;
+            const st = row.querySelector(statusSel);
+            const text = st ? (st.innerText || '').trim() : '';
+            if (text) return text;
+        }
+        return null;
+    }"""
+    TEXTAREA_SELECTOR = "textarea#auto-size-textarea"
+    # Candidatos en un solo selector (unión CSS); .first toma el primero del DOM
+    TEXTAREA_UNION = (
+        'textarea#auto-size-textarea.batch_track_textarea__rhhSa, '
+        'textarea#auto-size-textarea, '
+        'textarea[class*="batch_track_textarea"], '
+        'textarea[placeholder*="40"]'
+    )
+    TRACK_BUTTON_UNION = (
+        'div.batch_track_search-area-bottom__MV_vI.btn-primary, '
+        'div[class*="search-area-bottom"]:has-text("Rastrear"), '
+        'div.btn-primary:has-text("Rastrear"), '
+        'div.cursor-pointer:has-text("Rastrear"), '
+        'div.btn.btn-block:has-text("Rastrear")'
+    )
+    _TRACK_BUTTON_NAME: re.Pattern = re.compile(r"Rastrear|Track")
+    # Recursos bloqueados con block_resources=True
+    BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media", "stylesheet"})
+    # Analytics/trackers por host (la mayoría son xhr/fetch y pasarían el
+    # filtro por tipo de recurso)
+    BLOCKED_HOST_RE: re.Pattern = re.compile(
+        r"^https?://([^/]+\.)?(google-analytics\.com|googletagmanager\.com"
+        r"|doubleclick\.net|hotjar\.com|facebook\.net|clarity\.ms"
+        r"|segment\.io|sentry\.io)(:\d+)?/"
+    )
+    # Indicador de tiempo a remover del estado, ej. "(2 Días)"
+    _TIME_RE: re.Pattern = re.compile(r'\s*\(\d+\s+[Dd]ías?\)')
+    # Máximo a esperar que se rendericen los resultados tras "Rastrear"
+    RESULTS_TIMEOUT_MS = 20000
+    # Espera de la fila en la consulta directa: corta, porque si no aparece
+    # todavía queda el flujo de batch completo
+    DIRECT_TIMEOUT_MS = 4000
+    # Timeouts seguidos de la consulta directa tras los que se deja de
+    # usar en el resto de la sesión
+    DIRECT_MAX_TIMEOUTS = 3
+    # Marca las filas de resultados ya presentes en una página reutilizada
+    # para que la espera del batch siguiente solo cuente filas nuevas
+    _MARK_STALE_JS = """() => document.querySelectorAll(
+        'div.flex.items-center.gap-2 span.text-sm.font-medium.truncate, span[title]'
+    ).forEach(el => el.setAttribute('data-stale', '1'))"""
+    # Asigna el valor del textarea con el setter nativo (React ignora
+    # element.value = ... directo) y devuelve el largo resultante
+    _FILL_JS = """(el, text) => {
+        const setter = Object.getOwnPropertyDescriptor(
+            HTMLTextAreaElement.prototype, 'value'
+        ).set;
+        setter.call(el, text);
+        el.dispatchEvent(new Event('input', { bubbles: true }));
+        el.dispatchEvent(new Event('change', { bubbles: true }));
+        return el.value.length;
+    }"""
+
+    # Playwright compartido por las instancias de un mismo hilo (los objetos
+    # sync son thread-affine): el driver de node arranca una vez por hilo
+    _pw_local = threading.local()
+    _pw_atexit_registered = False
+
+    def __init__(
+        self,
+        headless: bool = True,
+        batch_size: int = 40,
+        pool_size: int = 1,
+        status_cache: Optional[StatusCache] = None,
+        block_resources: bool = True,
+    ):
+        self._pw = None
+        self.browser = None
         self._headless = headless
         self._batch_size = min(batch_size, 40)  # Max 40 per batch
-        logging.info("Launching Playwright Chromium. headless=%s", headless)
-
+        # Páginas tibias listas para el siguiente batch
+        self._page_pool: List = []
+        self._pool_size = max(1, int(pool_size))
+        # Caché persistente tracking -> estado (opcional)
+        self._status_cache = status_cache
+        # Bloquear imágenes/fuentes/CSS/analytics (menos bytes por página)
+        self._block_resources = block_resources
         # Args para evitar detección de bot
         launch_args = [
             "--no-sandbox",
@@ -33,16 +132,56 @@ class EnviaScraper:
             "--disable-features=IsolateOrigins,site-per-process",
             "--disable-web-security",
         ]
-        slow_mo = 250 if not headless else 0
         if not headless:
             launch_args.append("--start-maximized")
-
+        self._launch_args = launch_args
+        self._slow_mo = 250 if not headless else 0
+        # Timeouts seguidos de _get_status_direct (ver DIRECT_MAX_TIMEOUTS)
+        self._direct_timeouts = 0
+        # Pool de hilos de get_status_many: vive con la instancia y cada
+        # hilo conserva su EnviaScraper (Playwright + navegador tibios)
+        # entre llamadas; se cierra en close()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_workers = 0
+        self._thread_local = threading.local()
+
+    def _ensure_browser(self) -> None:
+        """Start Playwright and Chromium on first use (not in __init__)."""
+        if self.browser is not None:
+            return
+        self._pw = self._shared_playwright()
+        logging.info(
+            "Launching Playwright Chromium. headless=%s", self._headless
+        )
         self.browser = self._pw.chromium.launch(
-            headless=headless,
-            slow_mo=slow_mo,
-            args=launch_args,
+            headless=self._headless,
+            slow_mo=self._slow_mo,
+            args=self._launch_args,
         )
 
+    @classmethod
+    def _shared_playwright(cls):
+        """Return this thread's Playwright, starting it on first use."""
+        pw = getattr(cls._pw_local, "pw", None)
+        if pw is None:
+            pw = sync_playwright().start()
+            cls._pw_local.pw = pw
+            # atexit corre en el hilo principal: solo puede parar ese
+            if (threading.current_thread() is threading.main_thread()
+                    and not EnviaScraper._pw_atexit_registered):
+                atexit.register(cls.stop_playwright)
+                EnviaScraper._pw_atexit_registered = True
+        return pw
+
+    @classmethod
+    def stop_playwright(cls) -> None:
+        """Stop the shared Playwright of the calling thread, if any."""
+        pw = getattr(cls._pw_local, "pw", None)
+        cls._pw_local.pw = None
+        if pw is not None:
+            with suppress(Exception):
+                pw.stop()
+
     def _format_tracking_number(self, tracking_number: str) -> str:
         """
         Format tracking number as XXX-XXXXXXXXXX (3 digits, hyphen, rest).
@@ -62,65 +201,133 @@ class EnviaScraper:
     def _clean_status(self, status_text: str) -> str:
         """Remove time indicators like '(2 Días)' from status."""
         # Remove patterns like (X Días), (X días), etc.
-        cleaned = re.sub(r'\s*\(\d+\s+[Dd]ías?\)', '', status_text)
-        return cleaned.strip()
+        return self._TIME_RE.sub('', status_text).strip()
 
     def get_status(self, tracking_number: str) -> str:
         """
         Get status for a single tracking number.
-        Uses batch processing with just one number.
-        """
-        results = self.get_status_batch([tracking_number])
-        if results and len(results) > 0:
-            return results[0][1]
-        return ""
 
-    def get_status_batch(
-        self,
-        tracking_numbers: List[str]
-    ) -> List[Tuple[str, str]]:
+        Tries the direct track URL on a warm page first (no textarea,
+        no Rastrear click) and falls back to the batch flow. After
+        DIRECT_MAX_TIMEOUTS consecutive direct timeouts, only the batch
+        flow is used.
         """
-        Process a batch of up to 40 tracking numbers.
-        Returns list of (tracking_id, status) tuples.
+        if self._status_cache is not None:
+            cached = self._status_cache.get_many([tracking_number])
+            if cached.get(tracking_number):
+                return cached[tracking_number]
+
+        status = ""
+        if self._direct_timeouts < self.DIRECT_MAX_TIMEOUTS:
+            status = self._get_status_direct(tracking_number)
+        if not status:
+            # La caché ya se consultó arriba: ir directo al scraping del batch
+            results = self._scrape_batch([tracking_number])
+            status = results[0][1] if results else ""
+
+        if status and self._status_cache is not None:
+            self._status_cache.put_many([(tracking_number, status)])
+        return status
+
+    def _get_status_direct(self, tracking_number: str) -> str:
+        """
+        Single-number fast path: open 17track's track URL for the number
+        and read the status row of that number. Returns "" on any failure
+        or if no row for the number shows up (the caller then falls back
+        to the batch flow).
         """
-        context = None
         page = None
-
+        reusable = False
         try:
-            # Create new context with headers
-            if self._headless:
-                context = self.browser.new_context(
-                    viewport={"width": 1920, "height": 1080},
-                    user_agent=(
-                        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                        "AppleWebKit/537.36 (KHTML, like Gecko) "
-                        "Chrome/140.0.0.0 Safari/537.36"
-                    ),
-                    locale="es-ES",
-                    timezone_id="America/Bogota",
-                    extra_http_headers={
-                        "Accept": (
-                            "text/html,application/xhtml+xml,"
-                            "application/xml;q=0.9,image/webp,*/*;q=0.8"
-                        ),
-                        "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
-                        "Accept-Encoding": "gzip, deflate, br",
-                        "DNT": "1",
-                        "Connection": "keep-alive",
-                        "Upgrade-Insecure-Requests": "1",
-                    }
-                )
+            # Página tibia si hay (cookies aceptadas); si no, una nueva
+            if self._page_pool:
+                page = self._page_pool.pop()
+                # Un goto que solo cambia el #nums= no recarga el documento
+                # y dejaría visibles los resultados anteriores: pasar por
+                # about:blank fuerza una navegación real
+                page.goto("about:blank")
             else:
-                context = self.browser.new_context(
-                    viewport=None,
-                    user_agent=(
-                        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                        "AppleWebKit/537.36 (KHTML, like Gecko) "
-                        "Chrome/140.0.0.0 Safari/537.36"
-                    ),
-                    locale="es-ES",
-                    timezone_id="America/Bogota",
+                page = self._new_page()
+            page.goto(
+                self.SINGLE_TRACK_URL.format(tn=tracking_number),
+                timeout=60000,
+                wait_until="domcontentloaded",
+            )
+            try:
+                handle = page.wait_for_function(
+                    self._ROW_STATUS_JS,
+                    arg=[tracking_number, self.STATUS_SELECTOR],
+                    timeout=self.DIRECT_TIMEOUT_MS,
                 )
+            except PlaywrightTimeoutError:
+                # Ninguna fila de esta guía: la página sigue sana
+                reusable = True
+                self._direct_timeouts += 1
+                logging.debug(
+                    "Direct lookup found no row for %s", tracking_number
+                )
+                if self._direct_timeouts == self.DIRECT_MAX_TIMEOUTS:
+                    logging.info(
+                        "Direct lookup timed out %d times in a row; "
+                        "using the batch flow for the rest of the session",
+                        self._direct_timeouts,
+                    )
+                return ""
+            status = self._clean_status(handle.json_value() or "")
+            reusable = True
+            self._direct_timeouts = 0
+            return status
+        except Exception as e:
+            logging.debug(
+                "Direct lookup failed for %s, falling back to batch: %s",
+                tracking_number, e
+            )
+            return ""
+        finally:
+            if page is not None:
+                if reusable:
+                    self._release_page(page)
+                else:
+                    self._discard_page(page)
+
+    def _context_options(self) -> dict:
+        """Opciones de new_context() (headers/viewport según headless)."""
+        options = {
+            "user_agent": (
+                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                "AppleWebKit/537.36 (KHTML, like Gecko) "
+                "Chrome/140.0.0.0 Safari/537.36"
+            ),
+            "locale": "es-ES",
+            "timezone_id": "America/Bogota",
+        }
+        if self._headless:
+            options["viewport"] = {"width": 1920, "height": 1080}
+            options["extra_http_headers"] = {
+                "Accept": (
+                    "text/html,application/xhtml+xml,"
+                    "application/xml;q=0.9,image/webp,*/*;q=0.8"
+                ),
+                "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
+                "Accept-Encoding": "gzip, deflate, br",
+                "DNT": "1",
+                "Connection": "keep-alive",
+                "Upgrade-Insecure-Requests": "1",
+            }
+        else:
+            options["viewport"] = None
+        return options
+
+    def _new_page(self):
+        """
+        Crea contexto + página, aplica scripts/headers una sola vez,
+        navega a 17track y acepta cookies (arranque en frío).
+        """
+        self._ensure_browser()
+        context = self.browser.new_context(**self._context_options())
+        try:
+            if self._block_resources:
+                context.route("**/*", self._route_filter)
 
             page = context.new_page()
 
@@ -143,16 +350,15 @@ class EnviaScraper:
                 "Referer": "https://www.google.com/",
             })
 
-            # Navigate to 17track Envía page
-            url = "https://www.17track.net/es/carriers/env%C3%ADa-envia"
-            logging.info(
-                "Processing batch of %d tracking numbers",
-                len(tracking_numbers)
-            )
-            page.goto(url, timeout=60000, wait_until="domcontentloaded")
+            page.goto(self.TRACK_URL, timeout=60000,
+                      wait_until="domcontentloaded")
 
-            # Wait for page to fully render and load dynamic content
-            page.wait_for_timeout(5000)
+            # Esperar a que el formulario esté renderizado (en vez de una
+            # pausa fija): el banner de cookies aparece junto con él
+            with suppress(Exception):
+                page.locator(self.TEXTAREA_SELECTOR).wait_for(
+                    state="visible", timeout=15000
+                )
 
             # Try to accept cookie banners
             with suppress(Exception):
@@ -170,56 +376,238 @@ class EnviaScraper:
                     except:
                         continue
 
-            page.wait_for_timeout(1000)
+            return page
+        except Exception:
+            with suppress(Exception):
+                context.close()
+            raise
 
-            # Find the textarea con selector EXACTO
-            logging.info("Looking for textarea...")
-            textarea = page.locator(
-                'textarea#auto-size-textarea.batch_track_textarea__rhhSa'
+    def _acquire_page(self):
+        """
+        Toma una página tibia del pool (mismo contexto, cookies ya
+        aceptadas): si el formulario sigue visible se vacía el textarea en
+        el lugar; si no, se navega de vuelta a él. Sin páginas en el pool,
+        crea una nueva.
+        """
+        while self._page_pool:
+            page = self._page_pool.pop()
+            try:
+                textarea = page.locator(self.TEXTAREA_UNION).first
+                if textarea.is_visible():
+                    textarea.fill("")
+                    logging.debug("Reusing warm page (no navigation)")
+                else:
+                    page.goto(self.TRACK_URL, timeout=60000,
+                              wait_until="domcontentloaded")
+                    logging.debug("Reusing warm page from pool")
+                # Los resultados del batch anterior no cuentan para este
+                page.evaluate(self._MARK_STALE_JS)
+                return page
+            except Exception as e:
+                logging.debug("Discarding pooled page: %s", e)
+                self._discard_page(page)
+        return self._new_page()
+
+    def _release_page(self, page) -> None:
+        """Devuelve la página al pool (o la cierra si el pool está lleno)."""
+        if len(self._page_pool) < self._pool_size:
+            self._page_pool.append(page)
+        else:
+            self._discard_page(page)
+
+    @classmethod
+    def _route_filter(cls, route) -> None:
+        """Aborta recursos que el scraping no usa (imágenes, CSS, analytics)."""
+        request = route.request
+        try:
+            if (cls.BLOCKED_HOST_RE.match(request.url)
+                    or request.resource_type in cls.BLOCKED_RESOURCE_TYPES):
+                route.abort()
+            else:
+                route.continue_()
+        except Exception:
+            with suppress(Exception):
+                route.continue_()
+
+    @staticmethod
+    def _discard_page(page) -> None:
+        """Cierra la página y su contexto."""
+        context = page.context
+        with suppress(Exception):
+            page.close()
+        with suppress(Exception):
+            context.close()
+
+    def get_status_many(
+        self,
+        tracking_numbers: List[str],
+        workers: int = 4
+    ) -> List[Tuple[str, str]]:
+        """
+        Process any number of tracking numbers in 40-item batches,
+        running up to `workers` batches concurrently in threads.
+
+        Playwright sync objects are thread-affine, so each thread of the
+        instance's pool keeps its own EnviaScraper (Playwright + browser)
+        in a threading.local; it stays warm across calls and is closed in
+        that same thread by close().
+        Returns (tracking_id, status) tuples in input order.
+        """
+        tns = list(tracking_numbers)
+        chunks = [
+            tns[i:i + self._batch_size]
+            for i in range(0, len(tns), self._batch_size)
+        ]
+        workers = max(1, min(int(workers), len(chunks)))
+
+        # Un solo batch (o un solo worker): usar este mismo navegador
+        if workers <= 1:
+            results: List[Tuple[str, str]] = []
+            for chunk in chunks:
+                results.extend(self.get_status_batch(chunk))
+            return results
+
+        executor = self._worker_pool(workers)
+        logging.info(
+            "Processing %d batches with %d threads", len(chunks), workers
+        )
+        futures = [
+            executor.submit(self._run_worker_batch, chunk) for chunk in chunks
+        ]
+
+        results = []
+        for chunk, future in zip(chunks, futures):
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                # Un hilo que no pudo arrancar su navegador deja el batch vacío
+                logging.error("Batch worker failed: %s", e)
+                results.extend((tn, "") for tn in chunk)
+        return results
+
+    def _worker_pool(self, workers: int) -> ThreadPoolExecutor:
+        """Pool de hilos de la instancia, recreado solo si hace falta crecer."""
+        if self._executor is None or workers > self._executor_workers:
+            self._shutdown_workers()
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="envia-worker"
             )
+            self._executor_workers = workers
+        return self._executor
+
+    def _run_worker_batch(
+        self,
+        tracking_numbers: List[str]
+    ) -> List[Tuple[str, str]]:
+        """Procesa un batch con el EnviaScraper del hilo actual."""
+        scraper = getattr(self._thread_local, "scraper", None)
+        if scraper is None:
+            scraper = EnviaScraper(
+                headless=self._headless,
+                batch_size=self._batch_size,
+                status_cache=self._status_cache,
+                block_resources=self._block_resources,
+            )
+            self._thread_local.scraper = scraper
+        return scraper.get_status_batch(tracking_numbers)
+
+    def _close_worker_scraper(self, barrier: threading.Barrier) -> None:
+        """Cierra el scraper y el Playwright del hilo actual del pool."""
+        # La barrera reparte exactamente una tarea de cierre por hilo
+        with suppress(threading.BrokenBarrierError):
+            barrier.wait(timeout=30)
+        scraper = getattr(self._thread_local, "scraper", None)
+        self._thread_local.scraper = None
+        if scraper is not None:
+            scraper.close()
+        EnviaScraper.stop_playwright()
+
+    def _shutdown_workers(self) -> None:
+        """Cierra los scrapers de cada hilo del pool y el pool mismo."""
+        executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        barrier = threading.Barrier(self._executor_workers)
+        for _ in range(self._executor_workers):
+            executor.submit(self._close_worker_scraper, barrier)
+        executor.shutdown(wait=True)
+        self._executor_workers = 0
+
+    def get_status_batch(
+        self,
+        tracking_numbers: List[str]
+    ) -> List[Tuple[str, str]]:
+        """
+        Process a batch of up to 40 tracking numbers.
+        Returns list of (tracking_id, status) tuples.
+
+        With a status cache, only cache misses are sent to 17track.
+        """
+        if self._status_cache is None:
+            return self._scrape_batch(tracking_numbers)
+
+        hits = self._status_cache.get_many(tracking_numbers)
+        misses = [tn for tn in tracking_numbers if tn not in hits]
+        if hits:
+            logging.info(
+                "Status cache: %d hits, %d misses", len(hits), len(misses)
+            )
+
+        if misses:
+            scraped = self._scrape_batch(misses)
+            self._status_cache.put_many(scraped)
+            hits.update((tn, status) for tn, status in scraped if status)
+
+        return [(tn, hits.get(tn, "")) for tn in tracking_numbers]
+
+    def _scrape_batch(
+        self,
+        tracking_numbers: List[str]
+    ) -> List[Tuple[str, str]]:
+        """Scrape a batch of up to 40 tracking numbers (no cache)."""
+        page = None
+        reusable = False
+
+        try:
+            logging.info(
+                "Processing batch of %d tracking numbers",
+                len(tracking_numbers)
+            )
+            # Guías repetidas no ocupan cupos del batch: se envía cada una
+            # una vez y el resultado se replica a todas sus apariciones
+            unique = list(dict.fromkeys(tracking_numbers))[:40]
+            if len(unique) < len(tracking_numbers):
+                logging.info(
+                    "Deduplicated batch: %d unique of %d",
+                    len(unique), len(tracking_numbers)
+                )
+
+            page = self._acquire_page()
+
+            # Find the textarea: una sola espera cubre todos los candidatos
+            logging.info("Looking for textarea...")
+            textarea = page.locator(self.TEXTAREA_UNION).first
 
             try:
                 textarea.wait_for(state="visible", timeout=15000)
                 logging.info("Textarea found!")
             except Exception as e:
                 logging.error(f"Textarea not found: {e}")
-                # Try fallback
-                fallback_selectors = [
-                    'textarea#auto-size-textarea',
-                    'textarea[class*="batch_track_textarea"]',
-                    'textarea[placeholder*="40"]'
-                ]
-                for selector in fallback_selectors:
-                    try:
-                        textarea = page.locator(selector).first
-                        textarea.wait_for(state="visible", timeout=5000)
-                        logging.info(
-                            f"Textarea found with fallback: {selector}")
-                        break
-                    except:
-                        continue
-                else:
-                    raise Exception("No se encontró el textarea")
+                raise Exception("No se encontró el textarea")
 
             textarea.scroll_into_view_if_needed()
-            page.wait_for_timeout(500)
 
             # Preparar texto del batch (sin formato, números tal cual)
-            batch_text = "\n".join(tracking_numbers[:40])
+            batch_text = "\n".join(unique)
 
-            # Método 1: Intentar con JavaScript (más confiable)
+            # Método 1: Intentar con JavaScript (más confiable). Una sola
+            # llamada asigna el valor y devuelve su largo para verificarlo
             logging.debug("Filling textarea with JavaScript...")
+            filled_len = None
             try:
-                textarea.evaluate(
-                    """(element, text) => {
-                        element.value = text;
-                        element.dispatchEvent(new Event('input', { bubbles: true }));
-                        element.dispatchEvent(new Event('change', { bubbles: true }));
-                    }""",
-                    batch_text
-                )
+                filled_len = textarea.evaluate(self._FILL_JS, batch_text)
                 logging.info(
-                    f"Filled {len(tracking_numbers)} tracking numbers via JavaScript"
+                    f"Filled {len(unique)} tracking numbers via JavaScript"
                 )
             except Exception as e:
                 logging.warning(
@@ -232,7 +620,7 @@ class EnviaScraper:
                     page.wait_for_timeout(300)
                     textarea.fill(batch_text)
                     logging.info(
-                        f"Filled {len(tracking_numbers)} tracking numbers via click+fill"
+                        f"Filled {len(unique)} tracking numbers via click+fill"
                     )
                 except Exception as e2:
                     logging.warning(f"Click+fill failed: {e2}, trying type")
@@ -244,45 +632,31 @@ class EnviaScraper:
                     page.wait_for_timeout(300)
                     textarea.type(batch_text, delay=10)
                     logging.info(
-                        f"Typed {len(tracking_numbers)} tracking numbers character by character"
+                        f"Typed {len(unique)} tracking numbers character by character"
                     )
 
             # Verificar que el contenido se haya ingresado
-            page.wait_for_timeout(500)
-            current_value = textarea.input_value()
-            if not current_value or len(current_value) < 10:
+            if filled_len is None:
+                filled_len = len(textarea.input_value() or "")
+            if filled_len < 10:
                 logging.error(
-                    f"Textarea appears empty after filling! Current value length: {len(current_value) if current_value else 0}"
+                    f"Textarea appears empty after filling! Current value length: {filled_len}"
                 )
-                # Último intento: Focus + paste
-                logging.debug("Last attempt: using clipboard paste...")
+                # Último intento: Focus + asignar de nuevo
+                logging.debug("Last attempt: focus + JavaScript fill...")
                 textarea.focus()
-                page.evaluate(
-                    """(text) => {
-                        const textarea = document.querySelector('textarea#auto-size-textarea');
-                        if (textarea) {
-                            textarea.focus();
-                            textarea.value = text;
-                            textarea.dispatchEvent(new Event('input', { bubbles: true }));
-                            textarea.dispatchEvent(new Event('change', { bubbles: true }));
-                        }
-                    }""",
-                    batch_text
-                )
-                page.wait_for_timeout(500)
+                textarea.evaluate(self._FILL_JS, batch_text)
             else:
                 logging.info(
-                    f"Textarea content verified: {len(current_value)} characters")
-
-            page.wait_for_timeout(1000)
+                    f"Textarea content verified: {filled_len} characters")
 
             # Find and click Rastrear button - SELECTOR EXACTO
             logging.info("Looking for Rastrear button...")
 
-            # Selector principal basado en el HTML exacto
-            track_button = page.locator(
-                'div.batch_track_search-area-bottom__MV_vI.btn-primary'
-            )
+            # Unión de selectores CSS + rol accesible: una sola espera
+            track_button = page.locator(self.TRACK_BUTTON_UNION).or_(
+                page.get_by_role("button", name=self._TRACK_BUTTON_NAME)
+            ).first
 
             try:
                 track_button.wait_for(state="visible", timeout=10000)
@@ -290,33 +664,11 @@ class EnviaScraper:
 
                 # Scroll to button to ensure it's in viewport
                 track_button.scroll_into_view_if_needed()
-                page.wait_for_timeout(500)
 
             except Exception as e:
-                logging.error(f"Primary button selector failed: {e}")
-                # Try fallback
-                fallback_buttons = [
-                    'div.batch_track_search-area-bottom__MV_vI:has-text("Rastrear")',
-                    'div.btn-primary:has-text("Rastrear")',
-                    'div[class*="search-area-bottom"]:has-text("Rastrear")',
-                    'div.cursor-pointer:has-text("Rastrear")',
-                    'div.btn.btn-block:has-text("Rastrear")'
-                ]
-                for selector in fallback_buttons:
-                    try:
-                        track_button = page.locator(selector).first
-                        track_button.wait_for(state="visible", timeout=5000)
-                        logging.info(f"Button found with fallback: {selector}")
-                        track_button.scroll_into_view_if_needed()
-                        page.wait_for_timeout(500)
-                        break
-                    except:
-                        continue
-                else:
-                    logging.warning("No button found, pressing Enter")
-                    textarea.press("Enter")
-                    page.wait_for_timeout(1000)
-                    track_button = None
+                logging.warning("No button found (%s), pressing Enter", e)
+                textarea.press("Enter")
+                track_button = None
 
             if track_button:
                 # Try clicking with force if needed
@@ -335,22 +687,37 @@ class EnviaScraper:
                         track_button.evaluate("element => element.click()")
                         logging.info("JavaScript clicked Rastrear button")
 
-            # Wait for results to load
+            # Wait for results to load: retorna apenas aparecen tantas
+            # filas de resultado como guías enviadas (o al vencer el timeout)
             logging.info("Waiting for results to load...")
-            page.wait_for_timeout(8000)
+            try:
+                page.wait_for_function(
+                    """cnt => document.querySelectorAll(
+                        'div.flex.items-center.gap-2 span.text-sm.font-medium.truncate:not([data-stale])'
+                    ).length >= cnt""",
+                    arg=len(unique),
+                    timeout=self.RESULTS_TIMEOUT_MS,
+                )
+            except PlaywrightTimeoutError:
+                logging.warning(
+                    "Not all results rendered after %d ms; extracting partial results",
+                    self.RESULTS_TIMEOUT_MS,
+                )
 
             # Extract all results
-            results = self._extract_results_from_page(page)
+            result_dict = self._extract_results_from_page(page)
 
-            logging.info("Batch complete: %d results extracted", len(results))
+            logging.info(
+                "Batch complete: %d results extracted", len(result_dict)
+            )
 
             # Fill missing results with empty status
-            result_dict = dict(results)
             complete_results = []
             for tn in tracking_numbers:
                 status = result_dict.get(tn, "")
                 complete_results.append((tn, status))
 
+            reusable = True
             return complete_results
 
         except Exception as e:
@@ -359,77 +726,68 @@ class EnviaScraper:
             return [(tn, "") for tn in tracking_numbers]
 
         finally:
-            with suppress(Exception):
-                if page:
-                    page.close()
-            with suppress(Exception):
-                if context:
-                    context.close()
+            # Páginas sanas vuelven al pool; las que fallaron se descartan
+            if page is not None:
+                if reusable:
+                    self._release_page(page)
+                else:
+                    self._discard_page(page)
 
     def _extract_results_from_page(
         self,
         page
-    ) -> List[Tuple[str, str]]:
+    ) -> Dict[str, str]:
         """
         Extract all tracking results from the page.
-        Returns list of (tracking_id, status) tuples.
+        Returns a {tracking_id: status} dict, ready for lookups.
+
+        The DOM is walked in-page with a single page.evaluate, so the whole
+        batch costs one round trip instead of several per result row.
         """
-        results: List[Tuple[str, str]] = []
+        results: Dict[str, str] = {}
 
         try:
-            # Find all result containers
-            result_divs = page.locator(
-                'div.flex.items-center.gap-2:'
-                'has(span.text-sm.font-medium.truncate)'
+            raw = page.evaluate(
+                """() => {
+                    const harvest = (rowSel, idSel, statusSel) =>
+                        Array.from(document.querySelectorAll(rowSel)).map(d => {
+                            const s = d.querySelector(idSel);
+                            const st = d.querySelector(statusSel);
+                            return [
+                                (s && (s.getAttribute('title') || s.innerText)) || '',
+                                (st && st.innerText) || ''
+                            ];
+                        });
+                    // Las filas de batches anteriores (data-stale) no cuentan
+                    let rows = harvest(
+                        'div.flex.items-center.gap-2:has(span.text-sm.font-medium.truncate:not([data-stale]))',
+                        'span.text-sm.font-medium.truncate',
+                        'div.text-sm.text-text-primary.flex.items-center.gap-1'
+                    );
+                    if (rows.length === 0) {
+                        // Fallback: try broader selector
+                        rows = harvest(
+                            'div:has(span[title]:not([data-stale])):has(div.text-sm.text-text-primary)',
+                            'span.text-sm.font-medium.truncate',
+                            'div.text-sm.text-text-primary.flex.items-center.gap-1'
+                        );
+                    }
+                    return rows;
+                }"""
             )
-
-            count = result_divs.count()
-            logging.info("Found %d result divs", count)
-
-            if count == 0:
-                # Fallback: try broader selector
-                logging.debug("Trying fallback selector...")
-                result_divs = page.locator(
-                    'div:has(span[title]):'
-                    'has(div.text-sm.text-text-primary)'
-                )
-                count = result_divs.count()
-                logging.info("Fallback found %d result divs", count)
-
-            for i in range(count):
-                try:
-                    div = result_divs.nth(i)
-
-                    # Extract tracking ID from title attribute or text
-                    id_locator = div.locator(
-                        'span.text-sm.font-medium.truncate'
+            logging.info("Found %d result divs", len(raw))
+
+            for tracking_id, status_text in raw:
+                tracking_id = tracking_id.strip()
+                status_text = self._clean_status(status_text)
+
+                if tracking_id and status_text:
+                    results[tracking_id] = status_text
+                    logging.debug(
+                        "Extracted: %s -> %s",
+                        tracking_id,
+                        status_text
                     )
-                    tracking_id = id_locator.get_attribute('title')
-
-                    if not tracking_id:
-                        tracking_id = id_locator.inner_text()
-
-                    tracking_id = tracking_id.strip()
-
-                    # Extract status (without time)
-                    status_locator = div.locator(
-                        'div.text-sm.text-text-primary.'
-                        'flex.items-center.gap-1'
-                    )
-                    status_text = status_locator.inner_text()
-                    status_text = self._clean_status(status_text)
-
-                    if tracking_id and status_text:
-                        results.append((tracking_id, status_text))
-                        logging.debug(
-                            "Extracted: %s -> %s",
-                            tracking_id,
-                            status_text
-                        )
-
-                except Exception as e:
-                    logging.warning("Error extracting result %d: %s", i, e)
-                    continue
 
         except Exception as e:
             logging.error("Error extracting results: %s", e)
@@ -437,9 +795,13 @@ class EnviaScraper:
         return results
 
     def close(self):
+        self._shutdown_workers()
+        while self._page_pool:
+            self._discard_page(self._page_pool.pop())
         with suppress(Exception):
             if self.browser:
                 self.browser.close()
-        with suppress(Exception):
-            if self._pw:
-                self._pw.stop()
+        self.browser = None
+        # Playwright queda vivo para la siguiente instancia del hilo;
+        # se detiene con stop_playwright() o al salir del proceso
+        self._pw = None
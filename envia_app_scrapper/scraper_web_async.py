@@ -1,15 +1,160 @@
 from __future__ import annotations
 import asyncio
 import logging
+import os
+import random
 import re
 from contextlib import suppress
-from typing import Iterable, List, Tuple
+from itertools import islice
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
 
 from playwright.async_api import (
     async_playwright,
     TimeoutError as PlaywrightTimeoutError
 )
 
+from scraper_cache import StatusCache
+
+try:
+    import re2 as _re  # opcional: google-re2 (DFA, tiempo lineal)
+except ImportError:
+    _re = re
+
+# Indicador de tiempo a remover del estado, ej. "(2 Días)"
+_STATUS_TIME_RE = _re.compile(r'\s*\(\d+\s+[Dd]ías?\)')
+# Recursos que no hacen falta para leer los estados (imágenes, fuentes,
+# CSS y video), reconocidos por extensión
+_STATIC_ASSET_GLOB = (
+    "**/*.{png,jpg,jpeg,gif,webp,svg,ico,woff,woff2,ttf,otf,eot,css,mp4,webm}"
+)
+# Analytics/trackers (cualquier tipo de recurso, incluidos scripts)
+_BLOCKED_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "hotjar.com",
+    "facebook.net",
+    "clarity.ms",
+    "segment.io",
+    "sentry.io",
+)
+_BLOCKED_HOSTS_RE = re.compile(
+    r"^https?://([^/]+\.)?("
+    + "|".join(re.escape(h) for h in _BLOCKED_HOSTS)
+    + r")(:\d+)?/"
+)
+
+
+async def _abort_route(route) -> None:
+    """Handler de ruta que solo aborta (estáticos y trackers)."""
+    with suppress(Exception):
+        await route.abort()
+
+# Palabras que acepta el patrón: ruta rápida sin regex en _clean_status
+_DAY_WORDS = frozenset({"Día", "Días", "día", "días"})
+
+
+# Args para evitar detección de bot
+_LAUNCH_ARGS = (
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-blink-features=AutomationControlled",
+    "--disable-features=IsolateOrigins,site-per-process",
+    "--disable-web-security",
+    "--disable-features=VizDisplayCompositor",
+)
+
+_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/140.0.0.0 Safari/537.36"
+)
+
+_HEADERS_HEADLESS = {
+    "Accept": (
+        "text/html,application/xhtml+xml,"
+        "application/xml;q=0.9,image/avif,"
+        "image/webp,image/apng,*/*;q=0.8,"
+        "application/signed-exchange;v=b3;q=0.7"
+    ),
+    "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
+    "Accept-Encoding": "gzip, deflate, br",
+    "DNT": "1",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+    "Sec-Fetch-Dest": "document",
+    "Sec-Fetch-Mode": "navigate",
+    "Sec-Fetch-Site": "none",
+    "Sec-Fetch-User": "?1",
+    "Cache-Control": "max-age=0",
+}
+
+_HEADERS_HEADED = {
+    "Accept": (
+        "text/html,application/xhtml+xml,"
+        "application/xml;q=0.9,image/avif,"
+        "image/webp,image/apng,*/*;q=0.8"
+    ),
+    "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
+    "Accept-Encoding": "gzip, deflate, br",
+    "DNT": "1",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+}
+
+_PAGE_HEADERS = {"Referer": "https://www.google.com/"}
+
+# Asigna el valor del textarea con el setter nativo (React ignora
+# element.value = ... directo) y devuelve el largo resultante
+_FILL_JS = """(el, text) => {
+    const setter = Object.getOwnPropertyDescriptor(
+        HTMLTextAreaElement.prototype, 'value'
+    ).set;
+    setter.call(el, text);
+    el.dispatchEvent(new Event('input', { bubbles: true }));
+    el.dispatchEvent(new Event('change', { bubbles: true }));
+    return el.value.length;
+}"""
+
+# Ocultar propiedades de automatización
+_INIT_JS = """
+Object.defineProperty(navigator, 'webdriver', {
+    get: () => undefined
+});
+Object.defineProperty(navigator, 'plugins', {
+    get: () => [1, 2, 3, 4, 5]
+});
+Object.defineProperty(navigator, 'languages', {
+    get: () => ['es-ES', 'es', 'en']
+});
+window.chrome = {
+    runtime: {}
+};
+Object.defineProperty(navigator, 'permissions', {
+    get: () => ({
+        query: () => Promise.resolve({ state: 'granted' })
+    })
+});
+"""
+
+
+# Playwright + Chromium compartidos por todas las instancias del proceso.
+# Hay un navegador por combinación de opciones de lanzamiento (headless,
+# slow_mo), cada uno con su contador: start() lo incrementa y close() solo
+# apaga el navegador cuando la última instancia lo libera, así el arranque
+# se paga una vez. Los objetos quedan atados al event loop que los creó:
+# un loop nuevo (otro asyncio.run) arranca su propio Playwright.
+_pw_ref = {"pw": None, "browsers": {}, "lock": None, "loop": None}
+
+
+def _shared_lock() -> asyncio.Lock:
+    """Lock de los navegadores compartidos para el event loop actual."""
+    loop = asyncio.get_running_loop()
+    if _pw_ref["loop"] is not loop:
+        _pw_ref.update(pw=None, browsers={}, lock=asyncio.Lock(), loop=loop)
+    return _pw_ref["lock"]
+
 
 class AsyncEnviaScraper:
     """Async Playwright scraper for Envía via 17track.net with batch processing.
@@ -20,6 +165,51 @@ class AsyncEnviaScraper:
     - Status format: "En tránsito (2 Días)" -> extract only "En tránsito"
     """
 
+    TRACK_URL = "https://www.17track.net/es/carriers/env%C3%ADa-envia"
+    TEXTAREA_SELECTOR = "textarea#auto-size-textarea"
+    COOKIE_SELECTOR = (
+        'button:has-text("Aceptar"), '
+        'button:has-text("Accept"), '
+        'button:has-text("Acepto"), '
+        '[class*="accept"], '
+        '[class*="cookie"] button'
+    )
+    # Marca las filas de resultados ya presentes en una página reutilizada
+    # y reinicia el estado de _RESULTS_READY_JS
+    _MARK_STALE_JS = """() => {
+        document.querySelectorAll(
+            'div.flex.items-center.gap-2 span.text-sm.font-medium.truncate, span[title]'
+        ).forEach(el => el.setAttribute('data-stale', '1'));
+        window.__pwLastCount = -1;
+        window.__pwStableTicks = 0;
+    }"""
+    # Listo cuando hay tantas filas nuevas como guías enviadas o, si la
+    # página renderiza menos (guías sin datos), cuando el conteo deja de
+    # crecer durante dos sondeos seguidos
+    _RESULTS_READY_JS = """cnt => {
+        const n = document.querySelectorAll(
+            'div.flex.items-center.gap-2 span.text-sm.font-medium.truncate:not([data-stale])'
+        ).length;
+        if (n >= cnt) return true;
+        const stable = n > 0 && n === window.__pwLastCount;
+        window.__pwStableTicks = stable ? (window.__pwStableTicks || 0) + 1 : 0;
+        window.__pwLastCount = n;
+        return window.__pwStableTicks >= 2;
+    }"""
+    # Intervalo de sondeo de _RESULTS_READY_JS
+    RESULTS_POLL_MS = 250
+    # Sondeo del banner de cookies en la primera carga (segundos)
+    COOKIE_PROBE_S = 2.0
+    COOKIE_POLL_S = 0.3
+    # Máximo a esperar que se rendericen los resultados tras "Rastrear"
+    RESULTS_TIMEOUT_MS = 20000
+    # Reintentos de batch: backoff min(cap, base * 2**intento) con jitter
+    RETRY_BASE_S = 1.0
+    RETRY_CAP_S = 8.0
+    # Tras tantos batches fallidos seguidos se pausan todos los workers
+    FAILURE_PAUSE_THRESHOLD = 3
+    FAILURE_PAUSE_S = 15.0
+
     def __init__(
         self,
         headless: bool = True,
@@ -28,7 +218,10 @@ class AsyncEnviaScraper:
         retries: int = 2,
         timeout_ms: int = 30000,
         block_resources: bool = True,
-        batch_size: int = 40
+        batch_size: int = 40,
+        log_api_requests: bool = False,
+        storage_state_path: Optional[str] = None,
+        status_cache: Optional[StatusCache] = None
     ):
         self._headless = headless
         self._max_concurrency = max(1, int(max_concurrency))
@@ -37,44 +230,130 @@ class AsyncEnviaScraper:
         self._timeout = int(timeout_ms)
         self._block_resources = block_resources
         self._batch_size = min(batch_size, 40)  # Max 40 per batch
+        # Registrar las llamadas XHR/fetch de 17track (descubrir su API JSON)
+        self._log_api_requests = log_api_requests
+        # Cookies/consentimiento guardados entre ejecuciones (None = no)
+        self._storage_state_path = storage_state_path
+        self._storage_loaded = False
+        # Caché de estados: las guías vigentes no pasan por el navegador
+        self._status_cache = status_cache
+        # El banner de cookies solo se busca en la primera página del
+        # contexto: el consentimiento queda en sus cookies
+        self._cookies_handled = False
         self._pw = None
         self.browser = None
-        self._sem = asyncio.Semaphore(self._max_concurrency)
+        self._browser_key: Optional[Tuple[bool, int]] = None
+        self._started = False
+        # Un solo contexto para todos los batches (caché HTTP, cookies y
+        # sesión TLS compartidas); cada worker usa su propia página
+        self._context = None
+        # Slots de página, uno por worker: la página tibia del slot (o None
+        # si hay que abrirla). La cola también limita la concurrencia
+        self._pages: asyncio.Queue = asyncio.Queue()
 
     async def start(self):
-        logging.info("[PW] Starting async_playwright...")
-        self._pw = await async_playwright().start()
-        logging.info("[PW] Launching Chromium. headless=%s", self._headless)
-
-        # Args para evitar detección de bot
-        launch_args = [
-            "--no-sandbox",
-            "--disable-dev-shm-usage",
-            "--disable-blink-features=AutomationControlled",
-            "--disable-features=IsolateOrigins,site-per-process",
-            "--disable-web-security",
-            "--disable-features=VizDisplayCompositor"
-        ]
-
-        if not self._headless:
-            launch_args.append("--start-maximized")
-
-        self.browser = await self._pw.chromium.launch(
-            headless=self._headless,
-            slow_mo=self._slow_mo,
-            args=launch_args
+        if self._started:
+            return
+        key = (self._headless, self._slow_mo)
+        async with _shared_lock():
+            if _pw_ref["pw"] is None:
+                logging.info("[PW] Starting async_playwright...")
+                _pw_ref["pw"] = await async_playwright().start()
+            entry = _pw_ref["browsers"].get(key)
+            if entry is None:
+                logging.info(
+                    "[PW] Launching Chromium. headless=%s", self._headless
+                )
+
+                launch_args = list(_LAUNCH_ARGS)
+                if not self._headless:
+                    launch_args.append("--start-maximized")
+
+                browser = await _pw_ref["pw"].chromium.launch(
+                    headless=self._headless,
+                    slow_mo=self._slow_mo,
+                    args=launch_args
+                )
+                logging.info(
+                    "[PW] Chromium launched. slow_mo=%s", self._slow_mo
+                )
+                entry = _pw_ref["browsers"][key] = {
+                    "browser": browser, "count": 0
+                }
+            else:
+                logging.debug("[PW] Reusing shared Playwright Chromium")
+            entry["count"] += 1
+            self._pw = _pw_ref["pw"]
+            self.browser = entry["browser"]
+            self._browser_key = key
+            self._started = True
+
+        self._storage_loaded = bool(
+            self._storage_state_path
+            and os.path.exists(self._storage_state_path)
+        )
+        self._cookies_handled = self._storage_loaded
+        self._context = await self._new_context()
+        # Warm-up: la primera página se abre ya (DNS, TLS, JS del sitio y
+        # cookies) y queda en su slot lista para el primer batch
+        warm = None
+        try:
+            warm = await self._open_page(self._context)
+        except Exception as e:
+            logging.warning("[PW] Warm-up navigation failed: %s", e)
+        self._pages.put_nowait(warm)
+        for _ in range(self._max_concurrency - 1):
+            self._pages.put_nowait(None)
+        logging.info(
+            "[PW] Shared context ready (%d page slots)", self._max_concurrency
         )
-        logging.info("[PW] Chromium launched. slow_mo=%s", self._slow_mo)
 
     async def close(self):
+        while not self._pages.empty():
+            page = self._pages.get_nowait()
+            with suppress(Exception):
+                if page:
+                    await page.close()
+        with suppress(Exception):
+            if self._context and self._storage_state_path:
+                os.makedirs(
+                    os.path.dirname(self._storage_state_path) or ".",
+                    exist_ok=True
+                )
+                await self._context.storage_state(
+                    path=self._storage_state_path
+                )
         with suppress(Exception):
-            if self.browser:
+            if self._context:
+                await self._context.close()
+        self._context = None
+
+        if not self._started:
+            return
+        browser = pw = None
+        async with _shared_lock():
+            self._started = False
+            self._pw = None
+            self.browser = None
+            browsers = _pw_ref["browsers"]
+            # Sin entrada: el estado compartido ya se reinició (otro loop)
+            entry = browsers.get(self._browser_key)
+            if entry is None:
+                return
+            entry["count"] -= 1
+            if entry["count"] > 0:
+                return
+            browser = browsers.pop(self._browser_key)["browser"]
+            if not browsers:
+                pw, _pw_ref["pw"] = _pw_ref["pw"], None
+        with suppress(Exception):
+            if browser:
                 logging.info("[PW] Closing browser...")
-                await self.browser.close()
+                await browser.close()
         with suppress(Exception):
-            if self._pw:
+            if pw:
                 logging.info("[PW] Stopping async_playwright...")
-                await self._pw.stop()
+                await pw.stop()
 
     def _format_tracking_number(self, tracking_number: str) -> str:
         """
@@ -92,87 +371,216 @@ class AsyncEnviaScraper:
         # Si es muy corto, devolver sin cambios
         return clean_number
 
+    @staticmethod
+    def _log_api_request(request) -> None:
+        """Log 17track XHR/fetch calls: URL, method, headers and body."""
+        if request.resource_type not in ("xhr", "fetch"):
+            return
+        if "17track" not in request.url:
+            return
+        logging.info(
+            "[PW] API %s %s body=%s",
+            request.method,
+            request.url,
+            (request.post_data or "")[:500]
+        )
+        logging.debug("[PW] API headers: %s", request.headers)
+
     def _clean_status(self, status_text: str) -> str:
         """Remove time indicators like '(2 Días)' from status."""
+        text = status_text.rstrip()
+        i = text.rfind('(')
+        if i < 0:
+            return text.lstrip()
+        # Caso común: el indicador es el último token, "... (N Días)"
+        if text.endswith(')'):
+            parts = text[i + 1:-1].split()
+            if (len(parts) == 2 and parts[0].isdigit()
+                    and parts[1] in _DAY_WORDS):
+                return text[:i].strip()
         # Remove patterns like (X Días), (X días), etc.
-        cleaned = re.sub(r'\s*\(\d+\s+[Dd]ías?\)', '', status_text)
-        return cleaned.strip()
+        return _STATUS_TIME_RE.sub('', text).strip()
 
     async def _extract_results_from_page(
         self,
         page
-    ) -> List[Tuple[str, str]]:
+    ) -> Dict[str, str]:
         """
         Extract all tracking results from the page.
-        Returns list of (tracking_id, status) tuples.
+        Returns a {tracking_id: status} dict, ready for lookups.
+
+        The DOM is walked in-page with a single page.evaluate, so the whole
+        batch costs one round trip instead of several per result row. Rows
+        are reached from their id span via closest() instead of :has().
         """
-        results: List[Tuple[str, str]] = []
+        results: Dict[str, str] = {}
 
         try:
-            # Wait for results to load - give time for dynamic content
-            logging.debug("[PW] Waiting for results to load...")
-            await asyncio.sleep(3)  # Wait for content to render
-
-            # Find all result containers using more generic selector
-            # Try multiple selectors in case page structure varies
-            result_divs = page.locator(
-                'div.flex.items-center.gap-2:has(span.text-sm.font-medium.truncate)'
+            raw = await page.evaluate(
+                """() => {
+                    // Sin :has(): se parte de cada span de guía y se sube
+                    // a su fila con closest() (una pasada por resultado)
+                    // Las filas de batches anteriores (data-stale) no cuentan
+                    const idSel = 'span.text-sm.font-medium.truncate:not([data-stale])';
+                    const statusSel = 'div.text-sm.text-text-primary.flex.items-center.gap-1';
+                    const idText = s => ((s.getAttribute('title') || s.innerText) || '').trim();
+                    const statusText = row => {
+                        const st = row.querySelector(statusSel);
+                        return (st && st.innerText) || '';
+                    };
+                    // Solo viajan filas con guía y estado: las vacías se
+                    // descartan en el navegador
+                    const rows = [];
+                    const push = (id, st) => { if (id && st.trim()) rows.push([id, st]); };
+                    for (const s of document.querySelectorAll(idSel)) {
+                        const row = s.closest('div.flex.items-center.gap-2');
+                        if (row) push(idText(s), statusText(row));
+                    }
+                    if (rows.length === 0) {
+                        // Fallback: subir desde cada span[title] hasta el
+                        // primer ancestro que contenga un estado
+                        for (const s of document.querySelectorAll('span[title]:not([data-stale])')) {
+                            let d = s.parentElement;
+                            while (d && !d.querySelector('div.text-sm.text-text-primary')) {
+                                d = d.parentElement;
+                            }
+                            if (d) push(idText(s), statusText(d));
+                        }
+                    }
+                    return rows;
+                }"""
             )
+            logging.info("[PW] Found %d result divs", len(raw))
 
-            count = await result_divs.count()
-            logging.info("[PW] Found %d result divs", count)
-
-            if count == 0:
-                # Fallback: try broader selector
-                logging.debug("[PW] Trying fallback selector...")
-                result_divs = page.locator(
-                    'div:has(span[title]):has(div.text-sm.text-text-primary)'
-                )
-                count = await result_divs.count()
-                logging.info("[PW] Fallback found %d result divs", count)
-
-            for i in range(count):
-                try:
-                    div = result_divs.nth(i)
+            for tracking_id, status_text in raw:
+                status_text = self._clean_status(status_text)
 
-                    # Extract tracking ID from title attribute or text
-                    id_locator = div.locator(
-                        'span.text-sm.font-medium.truncate'
+                if tracking_id and status_text:
+                    results[tracking_id] = status_text
+                    logging.debug(
+                        "[PW] Extracted: %s -> %s",
+                        tracking_id,
+                        status_text
                     )
-                    tracking_id = await id_locator.get_attribute('title')
 
-                    if not tracking_id:
-                        tracking_id = await id_locator.inner_text()
+        except Exception as e:
+            logging.error("[PW] Error extracting results: %s", e)
 
-                    tracking_id = tracking_id.strip()
+        return results
 
-                    # Extract status (without time)
-                    status_locator = div.locator(
-                        'div.text-sm.text-text-primary.flex.items-center.gap-1'
-                    )
-                    status_text = await status_locator.inner_text()
-                    status_text = self._clean_status(status_text)
-
-                    if tracking_id and status_text:
-                        results.append((tracking_id, status_text))
-                        logging.debug(
-                            "[PW] Extracted: %s -> %s",
-                            tracking_id,
-                            status_text
-                        )
+    async def _new_context(self):
+        """
+        Create the shared context with headers, route blocking and the
+        anti-automation init script installed once (reused across batches).
+        """
+        # Estado guardado (cookies ya aceptadas) de una ejecución anterior
+        state = self._storage_state_path if self._storage_loaded else None
+
+        # Create new context with headers and settings
+        if self._headless:
+            logging.debug("[PW] Creating new context (headless)")
+            context = await self.browser.new_context(
+                viewport={"width": 1920, "height": 1080},
+                user_agent=_USER_AGENT,
+                locale="es-ES",
+                timezone_id="America/Bogota",
+                extra_http_headers=_HEADERS_HEADLESS,
+                storage_state=state,
+            )
+        else:
+            logging.debug("[PW] Creating new context (headed)")
+            context = await self.browser.new_context(
+                viewport=None,
+                user_agent=_USER_AGENT,
+                locale="es-ES",
+                timezone_id="America/Bogota",
+                extra_http_headers=_HEADERS_HEADED,
+                storage_state=state,
+            )
 
-                except Exception as e:
-                    logging.warning(
-                        "[PW] Error extracting result %d: %s",
-                        i,
-                        e
-                    )
-                    continue
+        # Block heavy resources and trackers to speed up. Solo rutas
+        # estrechas: los patrones se evalúan en el driver y únicamente las
+        # requests bloqueables llegan a Python (el resto no se intercepta)
+        if self._block_resources:
+            logging.debug("[PW] Installing route handlers")
+            await context.route(_STATIC_ASSET_GLOB, _abort_route)
+            await context.route(_BLOCKED_HOSTS_RE, _abort_route)
+
+        # Ocultar propiedades de automatización
+        await context.add_init_script(_INIT_JS)
+        return context
+
+    async def _open_page(self, context):
+        """Open a page on the context, navigate to the form and accept cookies."""
+        page = await context.new_page()
+        if self._log_api_requests:
+            page.on("request", self._log_api_request)
+
+        # Set additional headers on the page
+        await page.set_extra_http_headers(_PAGE_HEADERS)
+
+        # Try to accept cookie banners solo en la primera página del
+        # contexto (o ninguna si el consentimiento ya viene en el estado
+        # guardado). El sondeo corre en segundo plano mientras carga el
+        # formulario en vez de bloquear después
+        accept_cookies = not self._cookies_handled
+        self._cookies_handled = True
+        await self._goto_form(page, accept_cookies=accept_cookies)
+        return page
+
+    async def _try_click_cookie(self, page) -> None:
+        """Probe for a cookie banner for a short while and click it if shown."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.COOKIE_PROBE_S
+        banner = page.locator(self.COOKIE_SELECTOR).first
+        while loop.time() < deadline:
+            with suppress(Exception):
+                if await banner.is_visible():
+                    await banner.click(timeout=1000)
+                    logging.debug("[PW] Cookie banner clicked")
+                    return
+            await asyncio.sleep(self.COOKIE_POLL_S)
+
+    async def _goto_form(self, page, accept_cookies: bool = False) -> None:
+        """Navigate to the 17track Envía page and wait for the textarea."""
+        logging.debug("[PW] Navigating to %s", self.TRACK_URL)
+        # domcontentloaded + espera del textarea: la señal es el contenido
+        # que se necesita, no la red quieta (analytics retrasa networkidle)
+        await page.goto(
+            self.TRACK_URL,
+            timeout=max(45000, self._timeout),
+            wait_until="domcontentloaded"
+        )
+        cookie_task = (
+            asyncio.create_task(self._try_click_cookie(page))
+            if accept_cookies else None
+        )
 
-        except Exception as e:
-            logging.error("[PW] Error extracting results: %s", e)
+        logging.debug("[PW] Waiting for page to render...")
+        try:
+            with suppress(PlaywrightTimeoutError):
+                await page.locator(self.TEXTAREA_SELECTOR).first.wait_for(
+                    state="visible", timeout=15000
+                )
+        except BaseException:
+            if cookie_task is not None:
+                cookie_task.cancel()
+            raise
+
+        if cookie_task is not None:
+            # El sondeo tiene su propio límite; aquí solo se espera lo que
+            # le quede (un banner tardío aún taparía el formulario)
+            with suppress(Exception):
+                await cookie_task
 
-        return results
+    async def get_status(self, tracking_number: str) -> str:
+        """
+        Get status for a single tracking number.
+
+        Uses the same page slots and batch flow as get_status_batch.
+        """
+        results = await self.get_status_batch([tracking_number])
+        return results[0][1] if results else ""
 
     async def get_status_batch(
         self,
@@ -182,151 +590,31 @@ class AsyncEnviaScraper:
         Process a batch of up to 40 tracking numbers.
         Returns list of (tracking_id, status) tuples.
         """
-        context = None
-        page = None
+        page = await self._pages.get()
+        healthy = False
 
         try:
-            # Create new context with headers and settings
-            if self._headless:
-                logging.debug("[PW] Creating new context (headless)")
-                context = await self.browser.new_context(
-                    viewport={"width": 1920, "height": 1080},
-                    user_agent=(
-                        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                        "AppleWebKit/537.36 (KHTML, like Gecko) "
-                        "Chrome/140.0.0.0 Safari/537.36"
-                    ),
-                    locale="es-ES",
-                    timezone_id="America/Bogota",
-                    extra_http_headers={
-                        "Accept": (
-                            "text/html,application/xhtml+xml,"
-                            "application/xml;q=0.9,image/avif,"
-                            "image/webp,image/apng,*/*;q=0.8,"
-                            "application/signed-exchange;v=b3;q=0.7"
-                        ),
-                        "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
-                        "Accept-Encoding": "gzip, deflate, br",
-                        "DNT": "1",
-                        "Connection": "keep-alive",
-                        "Upgrade-Insecure-Requests": "1",
-                        "Sec-Fetch-Dest": "document",
-                        "Sec-Fetch-Mode": "navigate",
-                        "Sec-Fetch-Site": "none",
-                        "Sec-Fetch-User": "?1",
-                        "Cache-Control": "max-age=0",
-                    }
-                )
-            else:
-                logging.debug("[PW] Creating new context (headed)")
-                context = await self.browser.new_context(
-                    viewport=None,
-                    user_agent=(
-                        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                        "AppleWebKit/537.36 (KHTML, like Gecko) "
-                        "Chrome/140.0.0.0 Safari/537.36"
-                    ),
-                    locale="es-ES",
-                    timezone_id="America/Bogota",
-                    extra_http_headers={
-                        "Accept": (
-                            "text/html,application/xhtml+xml,"
-                            "application/xml;q=0.9,image/avif,"
-                            "image/webp,image/apng,*/*;q=0.8"
-                        ),
-                        "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
-                        "Accept-Encoding": "gzip, deflate, br",
-                        "DNT": "1",
-                        "Connection": "keep-alive",
-                        "Upgrade-Insecure-Requests": "1",
-                    }
-                )
-
-            # Block heavy resources to speed up
-            if self._block_resources:
-                async def _route_handler(route):
-                    try:
-                        resource_type = route.request.resource_type
-                        if resource_type in {
-                            "image", "media", "font"
-                        }:
-                            await route.abort()
-                        else:
-                            await route.continue_()
-                    except Exception:
-                        with suppress(Exception):
-                            await route.continue_()
-
-                logging.debug("[PW] Installing route handler")
-                await context.route("**/*", _route_handler)
-
             logging.info(
                 "[PW] Processing batch of %d tracking numbers",
                 len(tracking_numbers)
             )
-            page = await context.new_page()
-
-            # Ocultar propiedades de automatización
-            await page.add_init_script("""
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                });
-                Object.defineProperty(navigator, 'plugins', {
-                    get: () => [1, 2, 3, 4, 5]
-                });
-                Object.defineProperty(navigator, 'languages', {
-                    get: () => ['es-ES', 'es', 'en']
-                });
-                window.chrome = {
-                    runtime: {}
-                };
-                Object.defineProperty(navigator, 'permissions', {
-                    get: () => ({
-                        query: () => Promise.resolve({ state: 'granted' })
-                    })
-                });
-            """)
-
-            # Set additional headers on the page
-            await page.set_extra_http_headers({
-                "Referer": "https://www.google.com/",
-            })
-
-            # Navigate to 17track Envía page
-            url = "https://www.17track.net/es/carriers/env%C3%ADa-envia"
-            logging.debug("[PW] Navigating to %s", url)
-            await page.goto(
-                url,
-                timeout=max(60000, self._timeout),
-                wait_until="domcontentloaded"  # Más rápido que networkidle
-            )
-
-            # Wait for page to fully render and load dynamic content
-            logging.debug("[PW] Waiting for page to render...")
-            # Esperar más tiempo para contenido dinámico
-            await asyncio.sleep(5)
-
-            # Try to accept cookie banners
-            with suppress(Exception):
-                # Try multiple cookie button selectors
-                cookie_selectors = [
-                    'button:has-text("Aceptar")',
-                    'button:has-text("Accept")',
-                    'button:has-text("Acepto")',
-                    '[class*="accept"]',
-                    '[class*="cookie"] button'
-                ]
-                for selector in cookie_selectors:
-                    try:
-                        cookie_btn = page.locator(selector).first
-                        await cookie_btn.click(timeout=2000)
-                        logging.debug("[PW] Cookie banner clicked")
-                        break
-                    except:
-                        continue
+            # Página tibia del slot: se reutiliza sin navegar si el
+            # formulario sigue visible
+            if page is not None and not page.is_closed():
+                textarea_visible = await page.locator(
+                    self.TEXTAREA_SELECTOR
+                ).first.is_visible()
+                if textarea_visible:
+                    logging.debug("[PW] Reusing warm page (no navigation)")
+                else:
+                    # Volver al formulario (cookies ya aceptadas)
+                    await self._goto_form(page)
+            else:
+                page = await self._open_page(self._context)
 
-            # Wait a bit after cookie
-            await asyncio.sleep(1)
+            # Marcar las filas de resultados previas para no contarlas
+            # como resultados de este batch
+            await page.evaluate(self._MARK_STALE_JS)
 
             # Find the textarea con el selector EXACTO
             logging.debug("[PW] Looking for textarea...")
@@ -360,22 +648,16 @@ class AsyncEnviaScraper:
                     raise Exception("No se encontró el textarea")
 
             await textarea.scroll_into_view_if_needed()
-            await asyncio.sleep(0.5)
 
             # Preparar texto del batch (sin formato, números tal cual)
             batch_text = "\n".join(tracking_numbers[:40])
 
-            # Método 1: Intentar con JavaScript (más confiable)
+            # Método 1: Intentar con JavaScript (más confiable). Una sola
+            # llamada asigna el valor y devuelve su largo para verificarlo
             logging.debug("[PW] Filling textarea with JavaScript...")
+            filled_len = None
             try:
-                await textarea.evaluate(
-                    """(element, text) => {
-                        element.value = text;
-                        element.dispatchEvent(new Event('input', { bubbles: true }));
-                        element.dispatchEvent(new Event('change', { bubbles: true }));
-                    }""",
-                    batch_text
-                )
+                filled_len = await textarea.evaluate(_FILL_JS, batch_text)
                 logging.info(
                     "[PW] Filled %d tracking numbers via JavaScript",
                     len(tracking_numbers)
@@ -410,35 +692,20 @@ class AsyncEnviaScraper:
                     )
 
             # Verificar que el contenido se haya ingresado
-            await asyncio.sleep(0.5)
-            current_value = await textarea.input_value()
-            if not current_value or len(current_value) < 10:
+            if filled_len is None:
+                filled_len = len(await textarea.input_value() or "")
+            if filled_len < 10:
                 logging.error(
                     "[PW] Textarea appears empty after filling! Current value length: %d",
-                    len(current_value) if current_value else 0
+                    filled_len
                 )
-                # Último intento: Focus + paste
-                logging.debug("[PW] Last attempt: using clipboard paste...")
+                # Último intento: Focus + asignar de nuevo
+                logging.debug("[PW] Last attempt: focus + JavaScript fill...")
                 await textarea.focus()
-                await page.evaluate(
-                    """(text) => {
-                        const textarea = document.querySelector('textarea#auto-size-textarea');
-                        if (textarea) {
-                            textarea.focus();
-                            textarea.value = text;
-                            textarea.dispatchEvent(new Event('input', { bubbles: true }));
-                            textarea.dispatchEvent(new Event('change', { bubbles: true }));
-                        }
-                    }""",
-                    batch_text
-                )
-                await asyncio.sleep(0.5)
+                await textarea.evaluate(_FILL_JS, batch_text)
             else:
                 logging.info(
-                    "[PW] Textarea content verified: %d characters", len(current_value))
-
-            # Wait a bit after filling
-            await asyncio.sleep(1)
+                    "[PW] Textarea content verified: %d characters", filled_len)
 
             # Find and click the Rastrear button - SELECTOR EXACTO
             logging.debug("[PW] Looking for Rastrear button...")
@@ -455,7 +722,6 @@ class AsyncEnviaScraper:
 
                 # Scroll to button to ensure it's in viewport
                 await track_button.scroll_into_view_if_needed()
-                await asyncio.sleep(0.5)
 
             except Exception as e:
                 logging.error("[PW] Primary button selector failed: %s", e)
@@ -479,7 +745,6 @@ class AsyncEnviaScraper:
                             selector
                         )
                         await track_button.scroll_into_view_if_needed()
-                        await asyncio.sleep(0.5)
                         break
                     except:
                         continue
@@ -489,7 +754,6 @@ class AsyncEnviaScraper:
                         "[PW] No button found, pressing Enter on textarea"
                     )
                     await textarea.press("Enter")
-                    await asyncio.sleep(1)
                     track_button = None
 
             if track_button:
@@ -509,26 +773,41 @@ class AsyncEnviaScraper:
                         await track_button.evaluate("element => element.click()")
                         logging.info("[PW] JavaScript clicked Rastrear button")
 
-            # Wait for results to load
+            # Wait for results to load: retorna apenas aparecen todas las
+            # filas, o cuando su conteo se estabiliza (o al vencer el timeout)
             logging.info("[PW] Waiting for results to load...")
-            await asyncio.sleep(8)  # Dar tiempo para que carguen resultados
+            try:
+                await page.wait_for_function(
+                    self._RESULTS_READY_JS,
+                    arg=len(tracking_numbers[:40]),
+                    polling=self.RESULTS_POLL_MS,
+                    timeout=self.RESULTS_TIMEOUT_MS,
+                )
+            except PlaywrightTimeoutError:
+                logging.warning(
+                    "[PW] Not all results rendered after %d ms; "
+                    "extracting partial results",
+                    self.RESULTS_TIMEOUT_MS,
+                )
 
             # Extract all results
-            results = await self._extract_results_from_page(page)
+            result_dict = await self._extract_results_from_page(page)
 
             logging.info(
                 "[PW] Batch complete: %d results extracted",
-                len(results)
+                len(result_dict)
             )
 
-            # Fill missing results with empty status
-            result_dict = dict(results)
-            complete_results = []
-            for tn in tracking_numbers:
-                status = result_dict.get(tn, "")
-                complete_results.append((tn, status))
-
-            return complete_results
+            # Fill missing results with empty status (una entrada por
+            # guía de entrada; filas de otros batches se ignoran). Las
+            # claves se normalizan: el sitio puede devolver las guías con
+            # otro casing o espacios
+            healthy = True
+            norm = {tid.strip().upper(): st for tid, st in result_dict.items()}
+            return [
+                (tn, norm.get(tn.strip().upper(), ""))
+                for tn in tracking_numbers
+            ]
 
         except Exception as e:
             logging.error("[PW] Error processing batch: %s", e)
@@ -536,12 +815,13 @@ class AsyncEnviaScraper:
             return [(tn, "") for tn in tracking_numbers]
 
         finally:
-            with suppress(Exception):
-                if page:
+            # Páginas sanas quedan en su slot; las que fallaron se cierran
+            # y el siguiente batch del slot abre una nueva
+            if not healthy and page is not None:
+                with suppress(Exception):
                     await page.close()
-            with suppress(Exception):
-                if context:
-                    await context.close()
+                page = None
+            self._pages.put_nowait(page)
 
     async def get_status_many(
         self,
@@ -551,73 +831,196 @@ class AsyncEnviaScraper:
         """
         Process multiple tracking numbers in batches of up to 40.
 
+        Thin wrapper over iter_status_many (which owns the cache logic)
+        that restores input order.
+
         Args:
             tracking_numbers: Iterable of tracking numbers to process
             rps: Requests per second limit (not used in batch mode)
 
         Returns:
-            List of (tracking_number, status) tuples
+            List of (tracking_number, status) tuples, in input order
         """
-        results: List[Tuple[str, str]] = []
         tn_list = list(tracking_numbers)
+        # Guía -> estado; una guía repetida conserva su estado no vacío
+        statuses: Dict[str, str] = {}
+        async for tn, status in self.iter_status_many(tn_list):
+            if status or tn not in statuses:
+                statuses[tn] = status
+        return [(tn, statuses.get(tn, "")) for tn in tn_list]
+
+    async def iter_status_many(
+        self,
+        tracking_numbers: Iterable[str]
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Stream (tracking_number, status) tuples as each batch finishes.
 
-        # Split into batches of 40
-        batches = []
-        for i in range(0, len(tn_list), self._batch_size):
-            batch = tn_list[i:i + self._batch_size]
+        Cached statuses come first; scraped ones follow in batch completion
+        order (not input order), so callers can write them while the
+        remaining batches are still running.
+        """
+        tn_list = list(tracking_numbers)
+        misses = tn_list
+        if self._status_cache is not None:
+            hits = await asyncio.to_thread(
+                self._status_cache.get_many, tn_list
+            )
+            if hits:
+                misses = [tn for tn in tn_list if tn not in hits]
+                logging.info(
+                    "[PW] Status cache: %d hits, %d misses",
+                    len(hits), len(misses)
+                )
+                for tn in tn_list:
+                    if tn in hits:
+                        yield tn, hits[tn]
+
+        if not misses:
+            return
+        async for _, batch_results in self._iter_batches(misses):
+            if self._status_cache is not None:
+                await asyncio.to_thread(
+                    self._status_cache.put_many, batch_results
+                )
+            for item in batch_results:
+                yield item
+
+    async def _iter_batches(
+        self,
+        tracking_numbers: Iterable[str]
+    ) -> AsyncIterator[Tuple[int, List[Tuple[str, str]]]]:
+        """Yield (batch_index, results) for each batch as it completes."""
+        # Split into batches of 40 en una sola pasada sobre el iterable
+        # (sin copiar antes la lista completa)
+        it = iter(tracking_numbers)
+        batches: List[List[str]] = []
+        total = 0
+        while True:
+            batch = list(islice(it, self._batch_size))
+            if not batch:
+                break
             batches.append(batch)
+            total += len(batch)
 
         logging.info(
             "[PW] Processing %d tracking numbers in %d batches",
-            len(tn_list),
+            total,
             len(batches)
         )
 
-        # Process batches with concurrency control
-        async def process_batch(batch: List[str], batch_num: int):
-            async with self._sem:
-                logging.info(
-                    "[PW] Starting batch %d/%d (%d items)",
-                    batch_num + 1,
-                    len(batches),
-                    len(batch)
-                )
+        # Cada batch devuelve su lista y el worker la publica en `done`
+        # junto con su índice; None marca el fin de la corrida
+        done: asyncio.Queue = asyncio.Queue()
+        pending: asyncio.Queue = asyncio.Queue()
+        for i, batch in enumerate(batches):
+            pending.put_nowait((i, batch))
+
+        # Fallos seguidos (entre todos los workers) y pausa global
+        consecutive_failures = 0
+        resume = asyncio.Event()
+        resume.set()
+
+        async def process_batch(
+            batch: List[str], batch_num: int
+        ) -> List[Tuple[str, str]]:
+            logging.info(
+                "[PW] Starting batch %d/%d (%d items)",
+                batch_num + 1,
+                len(batches),
+                len(batch)
+            )
 
-                # Retry logic for batch
-                for attempt in range(self._retries + 1):
-                    batch_results = await self.get_status_batch(batch)
+            nonlocal consecutive_failures
 
-                    # Check if we got meaningful results
-                    success_count = sum(
-                        1 for _, status in batch_results if status
-                    )
+            # Retry logic for batch
+            for attempt in range(self._retries + 1):
+                # Si el sitio está bloqueando, todos esperan la pausa
+                await resume.wait()
+                batch_results = await self.get_status_batch(batch)
 
-                    if success_count > 0 or attempt == self._retries:
-                        results.extend(batch_results)
-                        logging.info(
-                            "[PW] Batch %d complete: "
-                            "%d/%d successful",
-                            batch_num + 1,
-                            success_count,
-                            len(batch)
-                        )
-                        break
+                # Check if we got meaningful results
+                success_count = sum(
+                    1 for _, status in batch_results if status
+                )
 
-                    if attempt < self._retries:
-                        delay = 2 * (attempt + 1)
+                if success_count > 0:
+                    consecutive_failures = 0
+                else:
+                    consecutive_failures += 1
+                    if (consecutive_failures >= self.FAILURE_PAUSE_THRESHOLD
+                            and resume.is_set()):
+                        # Pausa global: ningún worker lanza batches mientras
                         logging.warning(
-                            "[PW] Batch %d failed, "
-                            "retrying after %ds",
-                            batch_num + 1,
-                            delay
+                            "[PW] %d consecutive failed batches, "
+                            "pausing all workers %.0fs",
+                            consecutive_failures,
+                            self.FAILURE_PAUSE_S
                         )
-                        await asyncio.sleep(delay)
+                        resume.clear()
+                        await asyncio.sleep(self.FAILURE_PAUSE_S)
+                        consecutive_failures = 0
+                        resume.set()
+
+                if success_count > 0 or attempt == self._retries:
+                    logging.info(
+                        "[PW] Batch %d complete: "
+                        "%d/%d successful",
+                        batch_num + 1,
+                        success_count,
+                        len(batch)
+                    )
+                    return batch_results
+
+                if attempt < self._retries:
+                    # Backoff exponencial con jitter: los reintentos de
+                    # varios workers no llegan al sitio al mismo tiempo
+                    delay = min(
+                        self.RETRY_CAP_S, self.RETRY_BASE_S * (2 ** attempt)
+                    ) * (0.5 + random.random())
+                    logging.warning(
+                        "[PW] Batch %d failed, "
+                        "retrying after %.1fs",
+                        batch_num + 1,
+                        delay
+                    )
+                    await asyncio.sleep(delay)
 
-        # Process all batches
-        tasks = [
-            process_batch(batch, i)
-            for i, batch in enumerate(batches)
-        ]
-        await asyncio.gather(*tasks)
+        # Pool fijo de workers (uno por slot de página) que toman batches
+        # de la cola: memoria constante sin importar el número de batches
+        async def worker():
+            while True:
+                try:
+                    i, batch = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    batch_results = await process_batch(batch, i)
+                except Exception:
+                    # Un batch roto no tumba la corrida: sus guías quedan
+                    # vacías y el worker sigue con la cola
+                    logging.exception("[PW] Batch %d crashed", i + 1)
+                    batch_results = [(tn, "") for tn in batch]
+                done.put_nowait((i, batch_results))
+
+        # Los workers no propagan errores (cada batch captura los suyos), así
+        # que basta gather: si se cancela la corrida, gather cancela a todos
+        # los workers y espera a que terminen (y devuelvan su página)
+        async def run_workers():
+            try:
+                workers = min(self._max_concurrency, len(batches))
+                await asyncio.gather(*(worker() for _ in range(workers)))
+            finally:
+                done.put_nowait(None)
 
-        return results
+        runner = asyncio.create_task(run_workers())
+        try:
+            while (item := await done.get()) is not None:
+                yield item
+            await runner
+        finally:
+            # El consumidor dejó de iterar: cancelar y esperar a los workers
+            if not runner.done():
+                runner.cancel()
+                with suppress(asyncio.CancelledError):
+                    await runner
@@ -0,0 +1,60 @@
+"""
+Tests de la caché de estados (vencimiento por estado y estados vacíos).
+"""
+import sys
+from pathlib import Path
+
+# Agregar el directorio padre al path para importar los módulos
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import scraper_cache  # noqa: E402
+from scraper_cache import DEFAULT_TTL, TTL_BY_STATUS, StatusCache  # noqa: E402
+
+
+class FakeClock:
+    """Reloj controlable que reemplaza time.time en scraper_cache."""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _cache(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scraper_cache.time, "time", clock)
+    return StatusCache(str(tmp_path / "status.sqlite")), clock
+
+
+def test_default_ttl_expires(tmp_path, monkeypatch):
+    cache, clock = _cache(tmp_path, monkeypatch)
+    cache.put_many([("014152617422", "En tránsito")])
+
+    clock.now += DEFAULT_TTL - 1
+    assert cache.get_many(["014152617422"]) == {"014152617422": "En tránsito"}
+
+    clock.now += 1
+    assert cache.get_many(["014152617422"]) == {}
+
+
+def test_entregado_uses_longer_ttl(tmp_path, monkeypatch):
+    cache, clock = _cache(tmp_path, monkeypatch)
+    cache.put_many([("014152617422", " Entregado "), ("024031227909", "En tránsito")])
+
+    clock.now += DEFAULT_TTL
+    assert cache.get_many(["014152617422", "024031227909"]) == {
+        "014152617422": " Entregado "
+    }
+
+    clock.now += TTL_BY_STATUS["entregado"] - DEFAULT_TTL
+    assert cache.get_many(["014152617422"]) == {}
+
+
+def test_empty_status_not_stored(tmp_path, monkeypatch):
+    cache, _ = _cache(tmp_path, monkeypatch)
+    cache.put_many([("014152617422", ""), ("024031227909", "Entregado")])
+
+    assert cache.get_many(["014152617422", "024031227909"]) == {
+        "024031227909": "Entregado"
+    }
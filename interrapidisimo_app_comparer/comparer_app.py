@@ -7,7 +7,7 @@ calculando coincidencias.
 Responsabilidades:
 - Leer STATUS DROPI (normalizado) y STATUS INTERRAPIDISIMO (crudo)
 - Normalizar STATUS INTERRAPIDISIMO antes de comparar
-- Calcular columna COINCIDEN (TRUE/FALSE)
+- Calcular columna COINCIDEN ("TRUE"/"FALSE", siempre en mayúsculas)
 - Actualizar Google Sheets con resultados
 
 Flujo:
@@ -24,13 +24,15 @@ Versión: 2.0.0
 from __future__ import annotations
 import argparse
 import logging
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Tuple, Dict
 
 from comparer_config import settings
 from comparer_logging import setup_logging
 from comparer_sheets import SheetsClient
-from comparer_normalizer import StatusNormalizer
+from comparer_normalizer import normalize_pairs
 from comparer_credentials import load_credentials
 
 
@@ -61,6 +63,13 @@ def parse_arguments() -> argparse.Namespace:
         help="Tamaño de batch (default: 5000)"
     )
     
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Procesos para normalizar en paralelo (default: núcleos de CPU)"
+    )
+    
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -70,12 +79,52 @@ def parse_arguments() -> argparse.Namespace:
     return parser.parse_args()
 
 
+# Por debajo de este número de filas el costo de arrancar procesos
+# supera lo que se gana normalizando en paralelo.
+PARALLEL_MIN_ROWS = 20000
+
+
+def normalize_all(
+    pairs: List[Tuple[str, str]],
+    workers: int
+) -> List[Tuple[str, str]]:
+    """
+    Normaliza todos los pares, repartiéndolos entre procesos si conviene.
+    
+    Args:
+        pairs: Lista de (status_dropi, status_inter) crudos
+        workers: Número máximo de procesos
+        
+    Returns:
+        List[Tuple[str, str]]: Pares normalizados, en el mismo orden
+    """
+    if workers <= 1 or len(pairs) < PARALLEL_MIN_ROWS:
+        return normalize_pairs(pairs)
+    
+    chunk_size = -(-len(pairs) // workers)
+    chunks = [
+        pairs[i:i + chunk_size]
+        for i in range(0, len(pairs), chunk_size)
+    ]
+    logging.info(
+        f"Normalizando {len(pairs)} filas en {len(chunks)} procesos"
+    )
+    
+    normalized: List[Tuple[str, str]] = []
+    with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+        # map() conserva el orden de los chunks
+        for part in pool.map(normalize_pairs, chunks):
+            normalized.extend(part)
+    return normalized
+
+
 def compare_statuses(
     sheets: SheetsClient,
     start_row: int,
     end_row: int | None,
     batch_size: int,
-    dry_run: bool
+    dry_run: bool,
+    workers: int = 1
 ) -> Tuple[int, int]:
     """
     Compara estados y actualiza columna COINCIDEN.
@@ -86,24 +135,21 @@ def compare_statuses(
         end_row: Fila final
         batch_size: Tamaño de batch
         dry_run: Modo simulación
+        workers: Procesos para normalizar en paralelo
         
     Returns:
         Tuple[int, int]: (total_procesado, total_coinciden)
     """
     logging.info("Iniciando comparación de estados...")
     
-    records = sheets.read_all_records()
-    updates: List[Tuple[int, Dict[str, str]]] = []
-    
-    total_processed = 0
-    total_coinciden = 0
+    # Solo se descarga el rango pedido; el primer registro es start_row
+    start_row = max(2, start_row)
+    records = sheets.read_all_records(start_row=start_row, end_row=end_row)
     
-    for idx, record in enumerate(records, start=2):
-        if idx < start_row:
-            continue
-        if end_row and idx > end_row:
-            break
-            
+    # 1. Recolectar filas con algún estado dentro del rango
+    rows: List[int] = []
+    pairs: List[Tuple[str, str]] = []
+    for idx, record in enumerate(records, start=start_row):
         # Obtener estados
         dropi_status = str(record.get("STATUS DROPI", "")).strip()
         inter_raw = str(record.get("STATUS INTERRAPIDISIMO", "")).strip()
@@ -111,29 +157,41 @@ def compare_statuses(
         if not dropi_status and not inter_raw:
             continue
         
-        # Normalizar STATUS INTERRAPIDISIMO (texto crudo → palabra clave)
-        inter_normalized = StatusNormalizer.normalize(inter_raw, source="inter")
-        
-        # Normalizar STATUS DROPI (ya viene casi normalizado, solo limpiar)
-        dropi_normalized = StatusNormalizer.normalize(dropi_status, source="dropi")
-        
+        rows.append(idx)
+        pairs.append((dropi_status, inter_raw))
+    
+    # 2. Normalizar (CPU-bound, paralelizable por chunks)
+    normalized = normalize_all(pairs, workers)
+    
+    # 3. Comparar y escribir en batches
+    updates: List[Tuple[int, Dict[str, str]]] = []
+    
+    total_processed = 0
+    total_coinciden = 0
+    
+    # Enlaces locales: evitan resolver atributos/globales en cada fila.
+    # Los dicts de resultado nunca se mutan, así que se comparten entre filas.
+    _append = updates.append
+    _TRUE = {"COINCIDEN": "TRUE"}
+    _FALSE = {"COINCIDEN": "FALSE"}
+    _debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+    
+    for idx, (dropi_status, inter_raw), (dropi_normalized, inter_normalized) in zip(
+        rows, pairs, normalized
+    ):
         # Comparar estados normalizados
-        coinciden = "TRUE" if (dropi_normalized == inter_normalized) else "FALSE"
-        
-        if coinciden == "TRUE":
-            total_coinciden += 1
+        match = dropi_normalized == inter_normalized
+        total_coinciden += match
         
         # Log para debugging
-        if coinciden == "FALSE":
+        if _debug and not match:
             logging.debug(
                 f"[{idx}] DISCREPANCIA: Dropi='{dropi_status}'→'{dropi_normalized}' "
                 f"vs Inter='{inter_raw}'→'{inter_normalized}'"
             )
         
         # Agregar a batch de actualizaciones
-        updates.append((idx, {
-            "COINCIDEN": coinciden
-        }))
+        _append((idx, _TRUE if match else _FALSE))
         total_processed += 1
         
         # Flush batch periódicamente
@@ -163,6 +221,7 @@ def main() -> int:
     logging.info("=== COMPARER APP INICIANDO ===")
     logging.info(f"Rango: {args.start_row}-{args.end_row or 'fin'}")
     logging.info(f"Batch size: {args.batch_size}")
+    logging.info(f"Workers: {args.workers}")
     
     try:
         # Inicializar servicios
@@ -175,7 +234,8 @@ def main() -> int:
             args.start_row,
             args.end_row,
             args.batch_size,
-            args.dry_run
+            args.dry_run,
+            args.workers
         )
         
         logging.info(f"=== COMPARER COMPLETADO ===")
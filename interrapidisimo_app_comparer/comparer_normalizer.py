@@ -23,7 +23,7 @@ from __future__ import annotations
 import os
 import json
 import logging
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 
 class StatusNormalizer:
@@ -146,3 +146,22 @@ class StatusNormalizer:
 
 # Instancia global
 _normalizer = StatusNormalizer()
+
+
+def normalize_pairs(pairs: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """
+    Normaliza una lista de pares (status_dropi, status_inter).
+    
+    Función de módulo (picklable) para poder ejecutarse en los procesos
+    de un ProcessPoolExecutor; cada proceso carga inter_map.json una
+    sola vez al importar este módulo.
+    
+    Args:
+        pairs: Lista de tuplas (status_dropi, status_inter) crudos
+        
+    Returns:
+        List[Tuple[str, str]]: Lista de (dropi_normalizado, inter_normalizado)
+    """
+    normalize_dropi = _normalizer.normalize_dropi
+    normalize_inter = _normalizer.normalize_interrapidisimo
+    return [(normalize_dropi(d), normalize_inter(i)) for d, i in pairs]
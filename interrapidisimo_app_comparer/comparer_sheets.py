@@ -52,15 +52,46 @@ class SheetsClient:
         
         logging.info(f"Conectado a spreadsheet: {spreadsheet_name}")
     
-    def read_all_records(self) -> List[Dict[str, Any]]:
+    def read_all_records(
+        self,
+        start_row: int | None = None,
+        end_row: int | None = None
+    ) -> List[Dict[str, Any]]:
         """
-        Lee todos los registros del spreadsheet.
+        Lee los registros del spreadsheet.
+        
+        Si se indica start_row/end_row solo se descarga ese rango de filas
+        (el filtrado ocurre en el servidor de Sheets) y los headers se leen
+        aparte de la fila 1.
+        
+        Args:
+            start_row: Primera fila de datos a leer (1-based, >= 2)
+            end_row: Última fila a leer (inclusiva, None = hasta el final)
         
         Returns:
-            List[Dict]: Lista de registros como diccionarios
+            List[Dict]: Lista de registros como diccionarios; el primero
+            corresponde a start_row
         """
-        records = self.worksheet.get_all_records()
-        logging.info(f"Leídos {len(records)} registros")
+        if start_row is None and end_row is None:
+            records = self.worksheet.get_all_records()
+            logging.info(f"Leídos {len(records)} registros")
+            return records
+        
+        headers = self.worksheet.row_values(1)
+        if not headers:
+            return []
+        
+        first_row = max(2, start_row or 2)
+        last_col = self._col_letter(len(headers))
+        a1_range = f"A{first_row}:{last_col}{end_row or ''}"
+        
+        values = self.worksheet.get(a1_range)
+        width = len(headers)
+        records = [
+            dict(zip(headers, row + [""] * (width - len(row))))
+            for row in values
+        ]
+        logging.info(f"Leídos {len(records)} registros (rango {a1_range})")
         return records
     
     def ensure_columns(self, column_names: List[str]) -> None:
@@ -111,9 +142,11 @@ class SheetsClient:
                     "values": [[values["COINCIDEN"]]]
                 })
         
-        # Ejecutar batch update
+        # Ejecutar batch update. RAW es parte del contrato de COINCIDEN:
+        # se guarda como texto "TRUE"/"FALSE" en mayúsculas (sin que Sheets
+        # lo convierta), así los lectores comparan sin normalizar.
         if batch_data:
-            self.worksheet.batch_update(batch_data)
+            self.worksheet.batch_update(batch_data, raw=True)
             logging.info(f"Batch update ejecutado: {len(batch_data)} celdas")
     
     @staticmethod
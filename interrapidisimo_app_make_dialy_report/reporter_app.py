@@ -30,6 +30,7 @@ from __future__ import annotations
 import argparse
 import logging
 import sys
+from typing import List
 
 from reporter_config import settings
 from reporter_logging import setup_logging
@@ -61,13 +62,34 @@ def parse_arguments() -> argparse.Namespace:
         help="Simular sin crear hoja"
     )
 
+    parser.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=0,
+        help=(
+            "Reutilizar la lectura de Sheets cacheada en disco si tiene "
+            "menos de N segundos (default: 0, sin caché)"
+        )
+    )
+
+    parser.add_argument(
+        "--server-filter",
+        action="store_true",
+        help=(
+            "Leer la columna COINCIDEN y descargar solo las filas con "
+            "COINCIDEN=FALSE (batchGetByDataFilter)"
+        )
+    )
+
     return parser.parse_args()
 
 
 def generate_report(
     sheets_manager: SheetsManager,
     sheet_name: str | None,
-    dry_run: bool
+    dry_run: bool,
+    cache_ttl: int = 0,
+    server_filter: bool = False
 ) -> str:
     """
     Genera reporte creando nueva hoja con discrepancias (COINCIDEN=FALSE).
@@ -76,36 +98,52 @@ def generate_report(
         sheets_manager: Cliente para gestionar Sheets
         sheet_name: Nombre de la hoja a crear (None = auto)
         dry_run: Modo simulación
+        cache_ttl: Vigencia de la caché de lectura en segundos (0 = sin caché)
+        server_filter: Filtrar discrepancias en el servidor (ignora caché)
 
     Returns:
         str: Nombre de la hoja creada (o vacío si dry-run)
     """
     logging.info("Leyendo datos de Google Sheets...")
 
-    # Leer todos los registros
-    all_records = sheets_manager.read_all_records()
+    if server_filter:
+        # Solo se descargan las filas con COINCIDEN=FALSE
+        headers, kept = sheets_manager.read_discrepancies()
+    else:
+        # Leer valores crudos (headers + filas) sin construir dicts por fila
+        headers, rows = sheets_manager.read_values(
+            use_cache=cache_ttl > 0,
+            ttl=cache_ttl
+        )
+
+        # Filtrar solo discrepancias (COINCIDEN=FALSE) por posición.
+        # COINCIDEN se normaliza una vez al cargar (strip + upper), así
+        # "false", "False " o ediciones manuales no se pierden del reporte.
+        # (get_values() rellena las filas al mismo ancho, así el índice existe)
+        kept: List[List[str]] = []
+        if "COINCIDEN" in headers:
+            coinc_idx = headers.index("COINCIDEN")
+            for row in rows:
+                row[coinc_idx] = str(row[coinc_idx]).strip().upper()
+            kept = [row for row in rows if row[coinc_idx] == "FALSE"]
 
-    # Filtrar solo discrepancias (COINCIDEN=FALSE)
-    discrepancias = [
-        r for r in all_records
-        if r.get("COINCIDEN", "").upper() == "FALSE"
-    ]
+        logging.info(f"Total registros: {len(rows)}")
 
-    logging.info(f"Total registros: {len(all_records)}")
-    logging.info(f"Discrepancias detectadas: {len(discrepancias)}")
+    logging.info(f"Discrepancias detectadas: {len(kept)}")
 
-    if not discrepancias:
+    if not kept:
         logging.warning("No hay discrepancias para reportar")
         return ""
 
     if dry_run:
         logging.info("[DRY-RUN] Simulación: hoja NO creada")
-        logging.info(f"Se crearían {len(discrepancias)} registros")
+        logging.info(f"Se crearían {len(kept)} registros")
         return ""
 
-    # Crear nueva hoja con discrepancias
+    # Crear nueva hoja con discrepancias (headers en el orden del origen)
     created_sheet = sheets_manager.create_report_sheet(
-        data=discrepancias,
+        data=kept,
+        headers=headers,
         sheet_name=sheet_name
     )
 
@@ -138,7 +176,9 @@ def main() -> int:
         created_sheet = generate_report(
             sheets_manager,
             args.sheet_name,
-            args.dry_run
+            args.dry_run,
+            args.cache_ttl,
+            args.server_filter
         )
 
         if created_sheet:
@@ -15,14 +15,19 @@ Fecha: Octubre 2025
 from __future__ import annotations
 import os
 import logging
+from functools import lru_cache
 
 from oauth2client.service_account import ServiceAccountCredentials
 
 
+@lru_cache(maxsize=1)
 def load_credentials() -> ServiceAccountCredentials:
     """
     Carga credenciales de Google desde archivo local credentials.json.
     
+    Memoizada: llamadas repetidas en el mismo proceso reutilizan las
+    credenciales ya cargadas.
+    
     Returns:
         ServiceAccountCredentials: Credenciales autenticadas
         
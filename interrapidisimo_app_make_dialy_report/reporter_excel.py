@@ -18,13 +18,20 @@ import logging
 from typing import List, Dict, Any
 
 import pandas as pd
-from openpyxl import load_workbook
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.utils import get_column_letter
 
 
 class ExcelGenerator:
     """
     Generador de archivos Excel formateados.
+    
+    Usa el modo write-only de openpyxl: las filas se escriben al archivo
+    a medida que se agregan, sin armar en memoria el modelo de celdas del
+    libro. Los datos del reporte sí se cargan completos en un DataFrame
+    (los anchos de columna requieren recorrerlos antes de escribir).
     """
     
     def generate(
@@ -48,33 +55,45 @@ class ExcelGenerator:
             logging.warning("No hay datos para generar Excel")
             return ""
         
-        # Crear DataFrame
+        # Crear DataFrame (celdas faltantes -> None, se escriben vacías)
         df = pd.DataFrame(data)
+        df = df.astype(object).where(df.notna(), None)
         
         # Ruta de salida
         output_path = os.path.join(output_dir, filename)
         
-        # Guardar Excel
+        # Guardar Excel en modo streaming
         logging.info(f"Generando Excel: {output_path}")
-        df.to_excel(output_path, index=False, engine='openpyxl')
+        wb = Workbook(write_only=True)
+        # Mismo nombre de hoja que usaba pandas.to_excel
+        ws = wb.create_sheet("Sheet1")
+        
+        # El formato debe aplicarse antes de escribir la primera fila
+        header = self._apply_formatting(ws, df)
+        ws.append(header)
+        for row in df.itertuples(index=False, name=None):
+            ws.append(row)
         
-        # Aplicar formato
-        self._apply_formatting(output_path)
+        wb.save(output_path)
         
         logging.info(f"Excel generado exitosamente: {len(data)} registros")
         return output_path
     
     @staticmethod
-    def _apply_formatting(file_path: str) -> None:
+    def _apply_formatting(ws, df: pd.DataFrame) -> List[WriteOnlyCell]:
         """
-        Aplica formato profesional al archivo Excel.
+        Aplica formato profesional a la hoja (write-only).
+        
+        Fija el ancho de cada columna y construye la fila de headers con
+        estilo. Debe llamarse antes de agregar filas a la hoja.
         
         Args:
-            file_path: Ruta del archivo Excel
+            ws: Worksheet write-only de openpyxl
+            df: Datos del reporte
+            
+        Returns:
+            List[WriteOnlyCell]: Fila de headers formateada
         """
-        wb = load_workbook(file_path)
-        ws = wb.active
-        
         # Formato de headers
         header_fill = PatternFill(
             start_color="4472C4",
@@ -83,26 +102,25 @@ class ExcelGenerator:
         )
         header_font = Font(bold=True, color="FFFFFF")
         
-        for cell in ws[1]:
+        header = []
+        for col in df.columns:
+            cell = WriteOnlyCell(ws, value=col)
             cell.fill = header_fill
             cell.font = header_font
             cell.alignment = Alignment(horizontal='center')
+            header.append(cell)
         
-        # Autoajustar columnas
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except (TypeError, AttributeError):
-                    pass
-            
+        # Autoajustar columnas: largo máximo por columna calculado con
+        # operaciones vectorizadas de pandas (sin recorrer celda por celda)
+        lengths = (
+            df.fillna("").astype(str)
+            .apply(lambda s: s.str.len().max())
+            .fillna(0)
+        )
+        for i, col in enumerate(df.columns, start=1):
+            max_length = max(int(lengths.iloc[i - 1]), len(str(col)))
             adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
+            ws.column_dimensions[get_column_letter(i)].width = adjusted_width
         
-        # Guardar cambios
-        wb.save(file_path)
         logging.info("Formato aplicado al Excel")
+        return header
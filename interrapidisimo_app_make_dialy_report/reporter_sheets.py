@@ -15,12 +15,33 @@ Versión: 2.0.0
 
 from __future__ import annotations
 import logging
-from typing import List, Dict, Any
+import os
+import pickle
+import time
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
+import pandas as pd
+
 import gspread
+from gspread.urls import SPREADSHEETS_API_V4_BASE_URL
 from oauth2client.service_account import ServiceAccountCredentials
 
+from gspread_utils import HTTP_CLIENT, gspread_retry
+
+
+# Clientes gspread autorizados por credencial (id del objeto), para no
+# re-autorizar cuando se crean varios SheetsManager en el mismo proceso
+_GC_CACHE: Dict[int, gspread.Client] = {}
+
+# Rangos por llamada a values:batchGetByDataFilter (acota el body del POST)
+DATA_FILTERS_PER_REQUEST = 500
+
+# Caché local de lecturas (opt-in) en el directorio de esta app
+CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "sheets"
+)
+
 
 class SheetsManager:
     """
@@ -49,26 +70,228 @@ class SheetsManager:
         self.spreadsheet_name = spreadsheet_name
 
         # Autenticar y abrir spreadsheet
-        gc = gspread.authorize(credentials)
-        self.spreadsheet = gc.open(spreadsheet_name)
+        gc = _GC_CACHE.get(id(credentials))
+        if gc is None:
+            gc = gspread.authorize(credentials, http_client=HTTP_CLIENT)
+            _GC_CACHE[id(credentials)] = gc
+        self.spreadsheet = gspread_retry(gc.open)(spreadsheet_name)
         self.worksheet = self.spreadsheet.sheet1
 
         logging.info(f"Conectado a spreadsheet: {spreadsheet_name}")
 
-    def read_all_records(self) -> List[Dict[str, Any]]:
+    def read_all_records(
+        self,
+        use_cache: bool = False,
+        ttl: int = 300
+    ) -> List[Dict[str, Any]]:
         """
         Lee todos los registros del spreadsheet principal.
 
+        Con use_cache=True, reutiliza una copia local (.cache/sheets/) si
+        tiene menos de ttl segundos, evitando descargar toda la hoja otra vez.
+
+        Args:
+            use_cache: Usar caché local en disco
+            ttl: Vigencia de la caché en segundos
+
         Returns:
             List[Dict]: Lista de registros como diccionarios
         """
-        records = self.worksheet.get_all_records()
+        cache_path = None
+        if use_cache:
+            key = f"{self.spreadsheet.id}_{self.worksheet.id}"
+            cache_path = os.path.join(CACHE_DIR, f"{key}.pkl")
+            records = self._load_cache(cache_path, ttl)
+            if records is not None:
+                logging.info(f"Leídos {len(records)} registros (caché)")
+                return records
+
+        records = gspread_retry(self.worksheet.get_all_records)()
         logging.info(f"Leídos {len(records)} registros")
+
+        if cache_path:
+            self._save_cache(cache_path, records)
         return records
 
+    def read_values(
+        self,
+        use_cache: bool = False,
+        ttl: int = 300
+    ) -> Tuple[List[str], List[List[str]]]:
+        """
+        Lee la hoja principal como valores crudos (headers + filas).
+
+        Evita construir un dict por cada fila: el llamador filtra por
+        posición y solo materializa las filas que conserva.
+
+        Args:
+            use_cache: Usar caché local en disco
+            ttl: Vigencia de la caché en segundos
+
+        Returns:
+            Tuple[List[str], List[List[str]]]: (headers, filas de datos)
+        """
+        cache_path = None
+        if use_cache:
+            key = f"{self.spreadsheet.id}_{self.worksheet.id}_values"
+            cache_path = os.path.join(CACHE_DIR, f"{key}.pkl")
+            values = self._load_cache(cache_path, ttl)
+            if values is not None:
+                logging.info(f"Leídas {max(len(values) - 1, 0)} filas (caché)")
+                return (values[0], values[1:]) if values else ([], [])
+
+        values = gspread_retry(self.worksheet.get_values)()
+        logging.info(f"Leídas {max(len(values) - 1, 0)} filas")
+
+        if cache_path:
+            self._save_cache(cache_path, values)
+        if not values:
+            return [], []
+        return values[0], values[1:]
+
+    def read_discrepancies(self) -> Tuple[List[str], List[List[str]]]:
+        """
+        Lee solo las filas con COINCIDEN=FALSE sin descargar toda la hoja.
+
+        Descarga la columna COINCIDEN, ubica las filas con FALSE y pide solo
+        esos rangos con values:batchGetByDataFilter: los bytes descargados
+        escalan con el número de discrepancias y no con el total de filas.
+        Es de solo lectura (no crea hojas ni escribe en el spreadsheet).
+
+        Returns:
+            Tuple[List[str], List[List[str]]]: (headers, filas con discrepancia)
+        """
+        headers = gspread_retry(self.worksheet.row_values)(1)
+        if "COINCIDEN" not in headers:
+            logging.warning("Columna COINCIDEN no encontrada")
+            return headers, []
+
+        coinc_idx = headers.index("COINCIDEN")
+        coinc = gspread_retry(self.worksheet.col_values)(coinc_idx + 1)
+        # Índices 0-based de fila (el 0 es el header); COINCIDEN se compara
+        # normalizado (strip + upper), igual que en la lectura completa
+        matches = [
+            i for i, value in enumerate(coinc)
+            if i and value.strip().upper() == "FALSE"
+        ]
+        if not matches:
+            logging.info("Leídas 0 discrepancias (filtro por rangos)")
+            return headers, []
+
+        num_cols = len(headers)
+        data_filters = [
+            {
+                "gridRange": {
+                    "sheetId": self.worksheet.id,
+                    "startRowIndex": start,
+                    "endRowIndex": end,
+                    "startColumnIndex": 0,
+                    "endColumnIndex": num_cols
+                }
+            }
+            for start, end in self._row_runs(matches)
+        ]
+
+        rows: List[List[str]] = []
+        for i in range(0, len(data_filters), DATA_FILTERS_PER_REQUEST):
+            chunk = data_filters[i:i + DATA_FILTERS_PER_REQUEST]
+            for matched in self._batch_get_by_data_filter(chunk):
+                for row in matched["valueRange"].get("values", []):
+                    row = row + [""] * (num_cols - len(row))
+                    row[coinc_idx] = row[coinc_idx].strip().upper()
+                    rows.append(row)
+
+        logging.info(f"Leídas {len(rows)} discrepancias (filtro por rangos)")
+        return headers, rows
+
+    def _batch_get_by_data_filter(
+        self,
+        data_filters: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Llama a spreadsheets.values.batchGetByDataFilter (gspread no lo expone).
+
+        Args:
+            data_filters: DataFilters a leer
+
+        Returns:
+            List[Dict]: valueRanges de la respuesta, en el orden de los filtros
+        """
+        url = (
+            f"{SPREADSHEETS_API_V4_BASE_URL}/{self.spreadsheet.id}"
+            "/values:batchGetByDataFilter"
+        )
+        response = gspread_retry(self.spreadsheet.client.request)(
+            "post",
+            url,
+            json={"dataFilters": data_filters, "majorDimension": "ROWS"}
+        )
+        return response.json().get("valueRanges", [])
+
+    @staticmethod
+    def _row_runs(indices: List[int]) -> List[Tuple[int, int]]:
+        """
+        Agrupa índices de fila ordenados en rangos contiguos [inicio, fin).
+
+        Args:
+            indices: Índices 0-based de fila, en orden ascendente
+
+        Returns:
+            List[Tuple[int, int]]: Rangos semiabiertos de filas consecutivas
+        """
+        runs: List[Tuple[int, int]] = []
+        for index in indices:
+            if runs and runs[-1][1] == index:
+                runs[-1] = (runs[-1][0], index + 1)
+            else:
+                runs.append((index, index + 1))
+        return runs
+
+    @staticmethod
+    def _load_cache(path: str, ttl: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Carga registros cacheados si existen y no han expirado.
+
+        Args:
+            path: Ruta del archivo de caché
+            ttl: Vigencia en segundos
+
+        Returns:
+            Registros cacheados, o None si no hay caché válida
+        """
+        try:
+            with open(path, "rb") as fh:
+                entry = pickle.load(fh)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Caché ilegible, se ignora: {e}")
+            return None
+
+        if time.time() - entry.get("ts", 0) >= ttl:
+            return None
+        return entry.get("rows")
+
+    @staticmethod
+    def _save_cache(path: str, records: List[Dict[str, Any]]) -> None:
+        """
+        Guarda registros en la caché local.
+
+        Args:
+            path: Ruta del archivo de caché
+            records: Registros a guardar
+        """
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as fh:
+                pickle.dump({"ts": time.time(), "rows": records}, fh)
+        except Exception as e:
+            logging.warning(f"No se pudo guardar caché: {e}")
+
     def create_report_sheet(
         self,
-        data: List[Dict[str, Any]],
+        data: List[List[Any]] | List[Dict[str, Any]] | pd.DataFrame,
+        headers: List[str] | None = None,
         sheet_name: str = None
     ) -> str:
         """
@@ -77,13 +300,25 @@ class SheetsManager:
         Si ya existe una hoja con el mismo nombre, la elimina y crea una nueva.
 
         Args:
-            data: Lista de diccionarios con datos de discrepancias
+            data: Discrepancias como filas (listas, requiere headers),
+                DataFrame o lista de diccionarios
+            headers: Headers en el orden de la hoja origen (para filas lista)
             sheet_name: Nombre de la hoja (default: discrepancias_YYYY-MM-DD)
 
         Returns:
             str: Nombre de la hoja creada
         """
-        if not data:
+        if headers is not None:
+            # Filas crudas con headers del origen: se escriben tal cual
+            body = list(data)
+        else:
+            if not isinstance(data, pd.DataFrame):
+                data = pd.DataFrame(data)
+            headers = [str(col) for col in data.columns]
+            # astype(object) deja tipos nativos serializables
+            body = data.fillna("").astype(object).values.tolist()
+
+        if not body:
             logging.warning("No hay datos para crear hoja")
             return ""
 
@@ -96,75 +331,145 @@ class SheetsManager:
 
         # Eliminar hoja si ya existe
         try:
-            existing_sheet = self.spreadsheet.worksheet(sheet_name)
-            self.spreadsheet.del_worksheet(existing_sheet)
+            existing_sheet = gspread_retry(self.spreadsheet.worksheet)(
+                sheet_name
+            )
+            gspread_retry(self.spreadsheet.del_worksheet)(existing_sheet)
             logging.info(f"Hoja existente eliminada: {sheet_name}")
         except gspread.exceptions.WorksheetNotFound:
             pass  # No existe, continuamos
 
         # Crear nueva hoja
-        new_sheet = self.spreadsheet.add_worksheet(
+        new_sheet = gspread_retry(self.spreadsheet.add_worksheet)(
             title=sheet_name,
-            rows=len(data) + 1,  # +1 para headers
-            cols=len(data[0].keys()) if data else 10
+            rows=len(body) + 1,  # +1 para headers
+            cols=len(headers)
         )
 
-        # Preparar datos
-        headers = list(data[0].keys())
-        rows = [headers]
-
-        for record in data:
-            row = [record.get(col, "") for col in headers]
-            rows.append(row)
-
-        # Escribir datos en batch
-        new_sheet.update(f"A1:Z{len(rows)}", rows)
+        rows = [headers] + body
 
-        # Formatear headers
-        self._format_headers(new_sheet, len(headers))
+        # Escribir datos + formato de headers + congelar fila 1 en un solo
+        # spreadsheets.batchUpdate (una llamada HTTP en vez de tres)
+        gspread_retry(self.spreadsheet.batch_update)({
+            "requests": [
+                self._update_cells_request(new_sheet.id, rows),
+                *self._header_format_requests(new_sheet.id, len(headers)),
+            ]
+        })
 
         logging.info(
             f"Hoja creada exitosamente: {sheet_name} "
-            f"({len(data)} registros)"
+            f"({len(body)} registros)"
         )
 
         return sheet_name
 
     @staticmethod
-    def _format_headers(sheet: gspread.Worksheet, num_cols: int) -> None:
+    def _cell_data(value: Any) -> Dict[str, Any]:
         """
-        Aplica formato a la fila de headers.
+        Convierte un valor Python al CellData de la API de Sheets.
 
         Args:
-            sheet: Worksheet a formatear
-            num_cols: Número de columnas
+            value: Valor de la celda
+
+        Returns:
+            Dict: CellData con userEnteredValue (texto literal, sin fórmulas)
         """
-        try:
-            # Formato de headers: fondo azul, texto blanco, negrita
-            sheet.format("A1:Z1", {
-                "backgroundColor": {
-                    "red": 0.26,
-                    "green": 0.45,
-                    "blue": 0.77
-                },
-                "textFormat": {
-                    "bold": True,
-                    "foregroundColor": {
-                        "red": 1.0,
-                        "green": 1.0,
-                        "blue": 1.0
-                    }
-                },
-                "horizontalAlignment": "CENTER"
-            })
+        if isinstance(value, bool):
+            return {"userEnteredValue": {"boolValue": value}}
+        if isinstance(value, (int, float)):
+            return {"userEnteredValue": {"numberValue": value}}
+        return {"userEnteredValue": {"stringValue": str(value)}}
+
+    @classmethod
+    def _update_cells_request(
+        cls,
+        sheet_id: int,
+        rows: List[List[Any]]
+    ) -> Dict[str, Any]:
+        """
+        Construye el request updateCells que escribe todas las filas desde A1.
 
-            # Congelar fila de headers
-            sheet.freeze(rows=1)
+        Args:
+            sheet_id: ID de la hoja destino
+            rows: Filas a escribir (headers incluidos)
 
-            logging.debug("Headers formateados correctamente")
+        Returns:
+            Dict: Request para spreadsheets.batchUpdate
+        """
+        cell_data = cls._cell_data
+        return {
+            "updateCells": {
+                "start": {"sheetId": sheet_id, "rowIndex": 0, "columnIndex": 0},
+                "rows": [
+                    {"values": [cell_data(v) for v in row]} for row in rows
+                ],
+                "fields": "userEnteredValue"
+            }
+        }
 
-        except Exception as e:
-            logging.warning(f"No se pudo formatear headers: {e}")
+    @staticmethod
+    def _header_format_requests(
+        sheet_id: int,
+        num_cols: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Construye los requests de formato de la fila de headers.
+
+        Args:
+            sheet_id: ID de la hoja a formatear
+            num_cols: Número de columnas
+
+        Returns:
+            List[Dict]: Requests repeatCell (formato) y
+            updateSheetProperties (congelar fila 1)
+        """
+        return [
+            # Formato de headers: fondo azul, texto blanco, negrita
+            {
+                "repeatCell": {
+                    "range": {
+                        "sheetId": sheet_id,
+                        "startRowIndex": 0,
+                        "endRowIndex": 1,
+                        "startColumnIndex": 0,
+                        "endColumnIndex": max(num_cols, 1)
+                    },
+                    "cell": {
+                        "userEnteredFormat": {
+                            "backgroundColor": {
+                                "red": 0.26,
+                                "green": 0.45,
+                                "blue": 0.77
+                            },
+                            "textFormat": {
+                                "bold": True,
+                                "foregroundColor": {
+                                    "red": 1.0,
+                                    "green": 1.0,
+                                    "blue": 1.0
+                                }
+                            },
+                            "horizontalAlignment": "CENTER"
+                        }
+                    },
+                    "fields": (
+                        "userEnteredFormat(backgroundColor,textFormat,"
+                        "horizontalAlignment)"
+                    )
+                }
+            },
+            # Congelar fila de headers
+            {
+                "updateSheetProperties": {
+                    "properties": {
+                        "sheetId": sheet_id,
+                        "gridProperties": {"frozenRowCount": 1}
+                    },
+                    "fields": "gridProperties.frozenRowCount"
+                }
+            }
+        ]
 
 
 # Mantener alias para compatibilidad
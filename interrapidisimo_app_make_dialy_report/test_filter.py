@@ -4,6 +4,33 @@ Script de prueba para verificar el filtrado de discrepancias.
 Simula el flujo del reporter sin conectarse a Google Sheets.
 """
 
+import os
+
+import pandas as pd
+
+# reporter_config exige estas variables al importarse
+os.environ.setdefault("SPREADSHEET_NAME", "test")
+os.environ.setdefault("DRIVE_FOLDER_ID", "test")
+
+from reporter_app import generate_report
+
+
+class StubSheetsManager:
+    """SheetsManager falso: sirve valores fijos y registra la hoja creada."""
+
+    def __init__(self, headers, rows):
+        self._headers = headers
+        self._rows = rows
+        self.created = None
+
+    def read_values(self, use_cache=False, ttl=0):
+        # Copias: generate_report normaliza COINCIDEN en el lugar
+        return list(self._headers), [list(row) for row in self._rows]
+
+    def create_report_sheet(self, data, headers, sheet_name=None):
+        self.created = (headers, data)
+        return "discrepancias_test"
+
 
 def test_filter_logic():
     """Prueba la lógica de filtrado de discrepancias."""
@@ -34,6 +61,12 @@ def test_filter_logic():
             "STATUS INTERRAPIDISIMO": "en tránsito",
             "COINCIDEN": "FALSE"
         },
+        {
+            "GUIA": "44444",
+            "STATUS DROPI": "ENTREGADO",
+            "STATUS INTERRAPIDISIMO": "en tránsito",
+            "COINCIDEN": " false "
+        },
         {
             "GUIA": "33333",
             "STATUS DROPI": "NOVEDAD",
@@ -42,11 +75,26 @@ def test_filter_logic():
         }
     ]
 
-    # Filtrar discrepancias (igual que en reporter_app.py)
-    discrepancias = [
-        r for r in mock_records
-        if r.get("COINCIDEN", "").upper() == "FALSE"
-    ]
+    # Valores crudos como los devuelve get_values() (headers + filas)
+    headers = list(mock_records[0].keys())
+    rows = [list(r.values()) for r in mock_records]
+
+    # Dry-run: filtra pero no crea la hoja
+    stub_manager = StubSheetsManager(headers, rows)
+    assert generate_report(stub_manager, None, dry_run=True) == ""
+    assert stub_manager.created is None
+
+    # Sin dry-run la hoja recibe exactamente las filas que el filtro conserva
+    stub_manager = StubSheetsManager(headers, rows)
+    assert generate_report(stub_manager, None, dry_run=False) == (
+        "discrepancias_test"
+    )
+    report_headers, kept = stub_manager.created
+    assert report_headers == headers
+    assert [row[0] for row in kept] == ["67890", "22222", "44444"]
+    # COINCIDEN llega normalizado (" false " -> "FALSE")
+    assert {row[headers.index("COINCIDEN")] for row in kept} == {"FALSE"}
+    discrepancias = pd.DataFrame(kept, columns=headers).to_dict("records")
 
     print("=" * 70)
     print("PRUEBA DE FILTRADO DE DISCREPANCIAS")